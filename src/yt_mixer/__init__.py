@@ -5,7 +5,7 @@ YT Mixer - Server-side YouTube Audio Mixer with Ducking and Podcast Processing
 __version__ = "0.1.0"
 __author__ = "1minds3t"
 
-from .config import config, Config, DATA_DIR, AUDIO_DIR, CHUNK_DIR
+from .config import config, Config, DATA_DIR, AUDIO_DIR, CHUNK_DIR, SCRATCH_DIR
 
 __all__ = [
     'config',
@@ -13,4 +13,5 @@ __all__ = [
     'DATA_DIR',
     'AUDIO_DIR',
     'CHUNK_DIR',
+    'SCRATCH_DIR',
 ]
\ No newline at end of file
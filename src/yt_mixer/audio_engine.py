@@ -1,4 +1,5 @@
 import os
+import json
 import logging
 import subprocess
 import threading
@@ -6,15 +7,161 @@ import random
 import time
 import shutil
 import traceback
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from queue import SimpleQueue, Empty
 from pathlib import Path
 import yt_dlp
-from .config import AUDIO_DIR, CHUNK_DIR
+from .config import AUDIO_DIR, SHARED_AUDIO_DIR, CHUNK_DIR, SCRATCH_DIR, MAX_SCRATCH_MB, MAX_AUDIO_CACHE_MB, config
 
 log = logging.getLogger(__name__)
 
-# GLOBAL LUFS LOCK - only ONE LUFS process across ALL workers
-LUFS_LOCK = threading.Lock()
-LUFS_QUEUE = []  # Queue of (worker_id, chunk_idx) waiting for LUFS
+# GLOBAL LUFS SLOTS - FINAL mixes across ALL workers share a CPU-proportional budget
+LUFS_SLOTS = max(1, (os.cpu_count() or 1) // 4)
+LUFS_SEM = threading.BoundedSemaphore(LUFS_SLOTS)
+
+# Mix output encoder: LAME VBR (~130 kbps) encodes faster than 128k CBR
+MP3_ENCODE = ['-c:a', 'libmp3lame', '-q:a', '5']
+# IMMEDIATE is replaced by QUICK minutes later: LAME's fast algorithm (-q 7) at the same VBR level
+IMMEDIATE_ENCODE = MP3_ENCODE + ['-compression_level', '7']
+# Filter-graph threading for the mix tiers; half the cores so concurrent sessions don't thrash
+FILTER_THREADS = max(2, (os.cpu_count() or 1) // 2)
+# (global options; codec threading is left at ffmpeg's default - libmp3lame is single-threaded)
+MIX_THREADS = [
+    '-filter_complex_threads', str(FILTER_THREADS),
+    '-filter_threads', str(FILTER_THREADS)
+]
+# Speech EQ: cut mud, lift presence, tame sibilance (shared by IMMEDIATE and QUICK)
+VOCAL_EQ = (
+    'equalizer=f=100:width_type=o:width=2:g=-6,'
+    'equalizer=f=800:width_type=o:width=2:g=4,'
+    'equalizer=f=2000:width_type=o:width=2:g=6,'
+    'equalizer=f=8000:width_type=o:width=2:g=-4'
+)
+# Raw PCM layout written to the concat FIFOs - speech is decoded mono (left channel, as FINAL
+# always used), halving its PCM and filter work; it is panned back to stereo just before amix
+PCM_INPUT = ['-f', 's16le', '-ar', '44100', '-ac', '2']
+SPEECH_PCM_INPUT = ['-f', 's16le', '-ar', '44100', '-ac', '1']
+PCM_BYTES_PER_SEC = 44100 * 2 * 2
+SPEECH_PCM_BYTES_PER_SEC = 44100 * 2
+SPEECH_DOWNMIX = 'pan=mono|c0=c0'
+SPEECH_UPMIX = 'pan=stereo|c0=c0|c1=c0'
+
+# Absolute tool paths + close_fds=False let CPython spawn via posix_spawn instead of fork/exec
+# (our own fds are non-inheritable by default, so nothing leaks into the children)
+FFMPEG = shutil.which('ffmpeg') or 'ffmpeg'
+FFPROBE = shutil.which('ffprobe') or 'ffprobe'
+
+# Reshuffle the cached playlist scrape on refill; re-scrape only after this long
+PLAYLIST_CACHE_TTL = 6 * 3600
+
+# ffmpeg stderr is spooled to an anonymous scratch file; only this much of its tail is ever read
+STDERR_TAIL_BYTES = 4096
+
+# Concurrent yt-dlp downloads per collector (network-bound, not CPU-bound)
+DOWNLOAD_WORKERS = 6
+
+# Process-wide pools instead of fresh threads per chunk: two collectors per chunk being
+# prepared, and upgrade pipelines (QUICK, then FINAL behind LUFS_SEM) with room for
+# QUICK mixes to proceed while FINALs wait for a slot
+COLLECT_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix='yt-mixer-collect')
+UPGRADE_POOL = ThreadPoolExecutor(max_workers=LUFS_SLOTS + 2, thread_name_prefix='yt-mixer-upgrade')
+
+def shutdown_pools():
+    """Drop queued collector/upgrade tasks at exit; running ones wind down via worker.running"""
+    for pool in (COLLECT_POOL, UPGRADE_POOL):
+        try:
+            pool.shutdown(wait=False, cancel_futures=True)
+        except TypeError:  # Python 3.8 has no cancel_futures
+            pool.shutdown(wait=False)
+
+# Session-independent flat extractors handed from a stopped worker to the next one,
+# so a playlist switch doesn't pay YoutubeDL construction again
+_YDL_FLAT_POOL = SimpleQueue()
+
+def _network_opts():
+    """yt-dlp options shared by every instance (outbound proxy, if configured)"""
+    proxy = config.get('proxy')
+    return {'proxy': proxy} if proxy else {}
+
+def _borrow_flat_ydl():
+    """Take a pooled extract_flat YoutubeDL, or build one"""
+    try:
+        return _YDL_FLAT_POOL.get_nowait()
+    except Empty:
+        return yt_dlp.YoutubeDL({
+            'quiet': True,
+            'extract_flat': True,
+            'no_warnings': True,
+            **_network_opts()
+        })
+
+def _scan_shared_audio():
+    """Index the cross-session download cache once at startup: video_id -> path"""
+    index = {}
+    with os.scandir(SHARED_AUDIO_DIR) as it:
+        for entry in it:
+            video_id, _, ext = entry.name.rpartition('.')
+            if video_id and ext not in ('part', 'ytdl'):
+                index[video_id] = Path(entry.path)
+    return index
+
+# Every finished download is hard-linked here too, so a later session with an overlapping
+# playlist links the file into its own dir instead of downloading it again
+_SHARED_AUDIO = _scan_shared_audio()
+
+def _share_audio(video_id, path):
+    """Publish a session's download to the shared cache (best effort)"""
+    shared = SHARED_AUDIO_DIR / f"{video_id}{path.suffix}"
+    try:
+        os.link(path, shared)
+    except FileExistsError:
+        pass
+    except OSError:
+        return
+    _SHARED_AUDIO[video_id] = shared
+
+def trim_shared_audio(max_bytes):
+    """Evict least-recently-used shared downloads that no session links to any more"""
+    entries = []
+    try:
+        with os.scandir(SHARED_AUDIO_DIR) as it:
+            for entry in it:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue  # Removed while we were scanning
+                # Files still linked from a session dir cost no extra space
+                if st.st_nlink == 1:
+                    entries.append((st.st_mtime, st.st_size, entry.path, entry.name))
+    except OSError:
+        return
+    
+    total = sum(size for _, size, _, _ in entries)
+    if total <= max_bytes:
+        return
+    
+    for _, size, path, name in sorted(entries):
+        try:
+            Path(path).unlink(missing_ok=True)
+        except OSError:
+            continue
+        _SHARED_AUDIO.pop(name.rpartition('.')[0], None)
+        total -= size
+        if total <= max_bytes:
+            break
+    log.info(f"Trimmed shared audio cache to {total // 2**20} MB")
+
+def _part_path(path):
+    """Where ffmpeg writes a mix before it is atomically renamed into place"""
+    return path.with_name(path.name + '.part')
+
+def _read_tail(err_file):
+    """Decode the tail of a spooled stderr file (only read when a command failed)"""
+    err_file.seek(0, os.SEEK_END)
+    err_file.seek(max(0, err_file.tell() - STDERR_TAIL_BYTES))
+    return err_file.read().decode(errors='replace')
 
 class AudioWorker:
     def __init__(self, session_id, music_pid, speech_pid):
@@ -26,27 +173,54 @@ class AudioWorker:
         # Session specific paths
         self.my_audio_dir = AUDIO_DIR / session_id
         self.my_chunk_dir = CHUNK_DIR / session_id
+        self.my_scratch_dir = SCRATCH_DIR / session_id
         self.my_audio_dir.mkdir(exist_ok=True)
         self.my_chunk_dir.mkdir(exist_ok=True)
+        self.my_scratch_dir.mkdir(parents=True, exist_ok=True)
         
         # State
-        self.music_queue = []
-        self.speech_queue = []
+        self.music_queue = deque()
+        self.speech_queue = deque()
         self.preloaded_chunks = []
+        self.pending_deletions = deque()  # Consumed chunk paths, unlinked by the background loop
         self.chunk_index = 0
         self.current_chunk_path = None
         self.current_chunk_quality = 'none'
         self.target_chunk_duration = 3600  # 1 hour
+        self.max_scratch_bytes = int(config.get('max_scratch_mb', MAX_SCRATCH_MB)) * 1024 * 1024
+        self.max_audio_cache_bytes = int(config.get('max_audio_cache_mb', MAX_AUDIO_CACHE_MB)) * 1024 * 1024
+        
+        # (codec, sample_rate, channels) per downloaded track
+        self._probe_cache = {}
+        # Seconds per downloaded track - from yt-dlp's info dict, ffprobe only as a fallback
+        self._durations = {}
+        # (queue_type, video_id) -> downloaded track, so cache lookups never list the directory
+        self._audio_index = self._scan_audio_dir()
+        # playlist_url -> (fetched_at, [video ids])
+        self._playlist_cache = {}
         
-        # Progress tracking
+        # Reused yt-dlp instances: one (pooled) flat extractor, plus idle downloaders per queue type
+        self._ydl_flat = _borrow_flat_ydl()
+        self._ydl_flat_lock = threading.Lock()  # Both collectors may refill at once
+        self._ydl_idle = {'music': SimpleQueue(), 'speech': SimpleQueue()}
+        
+        # Progress tracking - copy-on-write, rebound under progress_lock so readers need no lock
         self.mix_progress = {}
         self.error_log = []
         
         # LUFS tracking
-        self.lufs_in_progress = set()  # Track which chunks are doing LUFS
+        self.lufs_in_progress = frozenset()  # Chunks holding a LUFS slot (status only)
         
         # Locks
         self.lock = threading.Lock()
+        self.progress_lock = threading.Lock()
+        # Notified (under progress_lock) on every progress/error update, for pushed status streams
+        self.progress_changed = threading.Condition(self.progress_lock)
+        
+        # Wakes the background loop when a chunk is consumed or scratch frees up
+        self._needs_chunk = threading.Event()
+        # Notified (under self.lock) when a preloaded chunk is published, for waiting streams
+        self.chunk_ready = threading.Condition(self.lock)
         
         # Start background thread
         self.thread = threading.Thread(target=self._background_loop, daemon=True)
@@ -63,14 +237,12 @@ class AudioWorker:
         else:
             log.error(full_message)
         
-        with self.lock:
-            self.error_log.append({
-                'time': time.strftime('%H:%M:%S'),
-                'message': message
-            })
-            self.error_log = self.error_log[-10:]
+        entry = {'time': time.strftime('%H:%M:%S'), 'message': message}
+        with self.progress_lock:
+            self.error_log = (self.error_log + [entry])[-10:]
+            self.progress_changed.notify_all()
 
-    def get_video_ids(self, playlist_url, max_fetch=None):
+    def get_video_ids(self, playlist_url):
         """Extract video IDs"""
         if "&si=" in playlist_url:
             playlist_url = playlist_url.split("&si=")[0]
@@ -78,180 +250,453 @@ class AudioWorker:
             playlist_id = playlist_url.split("&")[0]
             playlist_url = f"https://www.youtube.com/playlist?list={playlist_id}"
         
-        ydl_opts = {
-            'quiet': True,
-            'extract_flat': True,
-            # 'playlistend': max_fetch,
-            'no_warnings': True
-        }
+        cached = self._playlist_cache.get(playlist_url)
+        if cached and time.time() - cached[0] < PLAYLIST_CACHE_TTL:
+            video_ids = list(cached[1])
+            random.shuffle(video_ids)
+            log.info(f"[{self.session_id}] Reusing {len(video_ids)} cached video IDs")
+            return video_ids
+        
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(playlist_url, download=False)
-                if not info:
-                    return []
-                entries = info.get('entries', [])
-                video_ids = [e['id'] for e in entries if e and 'id' in e]
-                random.shuffle(video_ids)
-                log.info(f"[{self.session_id}] Got {len(video_ids)} video IDs")
-                return video_ids
+            with self._ydl_flat_lock:
+                info = self._ydl_flat.extract_info(playlist_url, download=False)
+            if not info:
+                return []
+            entries = info.get('entries', [])
+            video_ids = [e['id'] for e in entries if e and 'id' in e]
+            if video_ids:
+                self._playlist_cache[playlist_url] = (time.time(), list(video_ids))
+            random.shuffle(video_ids)
+            log.info(f"[{self.session_id}] Got {len(video_ids)} video IDs")
+            return video_ids
         except Exception as e:
             self._log_error(f"Playlist fetch error: {e}", exc=True)
             return []
 
-    def _download_audio(self, video_id, output_path):
-        """Download audio from YouTube"""
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': str(output_path.with_suffix('')),
-            'quiet': True,
-            'no_warnings': True,
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '128',
-            }],
-            'noplaylist': True,
-        }
+    def _borrow_ydl(self, queue_type):
+        """Take an idle downloader for this queue type, building one if all are busy"""
+        try:
+            return self._ydl_idle[queue_type].get_nowait()
+        except Empty:
+            return yt_dlp.YoutubeDL({
+                'format': 'bestaudio[ext=m4a]/bestaudio[ext=mp3]/bestaudio/best',
+                'outtmpl': str(self.my_audio_dir / f"{queue_type}_%(id)s.%(ext)s"),
+                'quiet': True,
+                'no_warnings': True,
+                'noplaylist': True,
+                **_network_opts()
+            })
+
+    def _scan_audio_dir(self):
+        """Index tracks already on disk (a resumed session) - the only directory listing needed"""
+        index = {}
+        with os.scandir(self.my_audio_dir) as it:
+            for entry in it:
+                # Names follow the outtmpl: {queue_type}_{video_id}.{ext}
+                stem, _, ext = entry.name.rpartition('.')
+                queue_type, sep, video_id = stem.partition('_')
+                if sep and ext not in ('part', 'ytdl') and '.' not in stem:
+                    index[(queue_type, video_id)] = Path(entry.path)
+        return index
+
+    def _cached_audio(self, video_id, queue_type):
+        """Return an already-downloaded track for this video, refreshing its LRU timestamp"""
+        path = self._audio_index.get((queue_type, video_id))
+        if path is None:
+            return None
+        try:
+            if path.stat().st_size > 1024:
+                path.touch()
+                return path
+        except OSError:
+            pass
+        # Evicted by _trim_audio_cache (or truncated) - forget it
+        self._audio_index.pop((queue_type, video_id), None)
+        return None
+
+    def _link_shared_audio(self, video_id, queue_type):
+        """Hard-link another session's download of this video into our dir, or None"""
+        shared = _SHARED_AUDIO.get(video_id)
+        if shared is None:
+            return None
+        path = self.my_audio_dir / f"{queue_type}_{video_id}{shared.suffix}"
+        try:
+            os.link(shared, path)
+        except FileExistsError:
+            pass
+        except OSError:
+            _SHARED_AUDIO.pop(video_id, None)  # Evicted from the shared cache
+            return None
+        self._audio_index[(queue_type, video_id)] = path
+        return self._cached_audio(video_id, queue_type)
+
+    def _download_audio(self, video_id, queue_type):
+        """Download the native audio stream (no re-encode), return its path or None"""
+        cached = self._cached_audio(video_id, queue_type) or self._link_shared_audio(video_id, queue_type)
+        if cached:
+            log.debug(f"[{self.session_id}] Reusing cached {cached.name}")
+            return cached
+        
+        # A YoutubeDL instance is not safe to share between threads - each download borrows its own
+        ydl = self._borrow_ydl(queue_type)
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([f'https://www.youtube.com/watch?v={video_id}'])
-            return output_path.exists() and output_path.stat().st_size > 1024
+            info = ydl.extract_info(f'https://www.youtube.com/watch?v={video_id}', download=True)
+            output_path = Path(ydl.prepare_filename(info))
+            try:
+                if output_path.stat().st_size > 1024:  # One stat - no exists() first
+                    self._audio_index[(queue_type, video_id)] = output_path
+                    _share_audio(video_id, output_path)
+                    if info.get('duration'):
+                        self._durations[str(output_path)] = float(info['duration'])
+                    return output_path
+            except FileNotFoundError:
+                pass
+            return None
         except Exception as e:
             log.error(f"[{self.session_id}] Error downloading {video_id}: {e}")
-            return False
+            return None
+        finally:
+            self._ydl_idle[queue_type].put(ydl)
+
+    def _probe_stream(self, path):
+        """Get (codec, sample_rate, channels) of the audio stream - cached per track"""
+        key = str(path)
+        if key in self._probe_cache:
+            return self._probe_cache[key]
+        
+        cmd = [
+            FFPROBE, '-v', 'error', '-select_streams', 'a:0',
+            '-show_entries', 'stream=codec_name,sample_rate,channels',
+            '-of', 'csv=p=0', key
+        ]
+        try:
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, close_fds=False)
+            codec, sample_rate, channels = result.stdout.strip().split(',')[:3]
+            stream = (codec, sample_rate, channels)
+        except Exception:
+            stream = ('unknown', '0', '0')
+        
+        self._probe_cache[key] = stream
+        return stream
 
     def _get_audio_duration(self, path):
         """Get duration in seconds"""
         cmd = [
-            'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+            FFPROBE, '-v', 'error', '-show_entries', 'format=duration',
             '-of', 'default=noprint_wrappers=1:nokey=1', str(path)
         ]
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, close_fds=False)
             return float(result.stdout.strip())
         except Exception:
             return 0.0
 
+    def _fetch_track(self, video_id, queue_type):
+        """Download one track inside a pool worker, return (path, duration)"""
+        if not self.running:
+            return None, 0.0  # Queued behind a batch when the worker stopped
+        audio_path = self._download_audio(video_id, queue_type)
+        if not audio_path:
+            return None, 0.0
+        key = str(audio_path)
+        duration = self._durations.get(key)
+        if duration is None:
+            # Resumed from disk (no info dict) or yt-dlp didn't report one
+            duration = self._get_audio_duration(audio_path)
+            if duration:
+                self._durations[key] = duration
+        # Warm the stream-format cache here, in the pool, so _start_concat never forks ffprobe
+        self._probe_stream(audio_path)
+        return audio_path, duration
+
     def _ensure_queue_filled(self, queue_type):
-        """Ensure queue has content"""
+        """Ensure queue has content - the playlist fetch runs without holding self.lock"""
         queue = self.music_queue if queue_type == 'music' else self.speech_queue
         
         if len(queue) < 10:
             playlist_url = self.music_pid if queue_type == 'music' else self.speech_pid
             new_ids = self.get_video_ids(playlist_url)
             if new_ids:
-                queue.extend(new_ids)
+                with self.lock:
+                    queue.extend(new_ids)
                 log.info(f"[{self.session_id}] Refilled {queue_type} queue: {len(new_ids)}")
 
     def _collect_tracks_for_chunk(self, queue_type, target_duration):
-        """Collect tracks until target duration"""
+        """Collect tracks until target duration - downloads run in a bounded pool"""
         collected_tracks = []
         total_duration = 0.0
+        stop_at = target_duration * 0.9
         
-        while total_duration < target_duration:
-            with self.lock:
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as pool:
+            while self.running and total_duration <= stop_at:
                 self._ensure_queue_filled(queue_type)
                 queue = self.music_queue if queue_type == 'music' else self.speech_queue
-                if not queue:
+                with self.lock:
+                    batch = [queue.popleft() for _ in range(min(len(queue), DOWNLOAD_WORKERS * 2))]
+                if not batch:
                     self._log_error(f"{queue_type} queue empty")
                     break
-                video_id = queue.pop(0)
-            
-            audio_path = self.my_audio_dir / f"{queue_type}_{video_id}.mp3"
-            
-            if total_duration > (target_duration * 0.9):
-                log.info(f"[{self.session_id}] At 90% of target, stopping")
-                with self.lock:
-                    queue.insert(0, video_id)
-                break
-            
-            if not self._download_audio(video_id, audio_path):
-                continue
-            
-            duration = self._get_audio_duration(audio_path)
-            if duration > 5:
-                collected_tracks.append(audio_path)
-                total_duration += duration
-                log.info(f"[{self.session_id}] Added {queue_type} ({duration:.1f}s) - Total: {total_duration:.1f}s")
+                
+                futures = {
+                    pool.submit(self._fetch_track, video_id, queue_type): video_id
+                    for video_id in batch
+                }
+                unused = []
+                
+                for future in as_completed(futures):
+                    video_id = futures[future]
+                    if future.cancelled():
+                        unused.append(video_id)
+                        continue
+                    
+                    audio_path, duration = future.result()
+                    if total_duration > stop_at:
+                        # Target reached mid-batch - hand the extra track back (its download stays cached)
+                        unused.append(video_id)
+                        continue
+                    if not audio_path:
+                        continue
+                    
+                    if duration > 5:
+                        collected_tracks.append(audio_path)
+                        total_duration += duration
+                        log.info(f"[{self.session_id}] Added {queue_type} ({duration:.1f}s) - Total: {total_duration:.1f}s")
+                    
+                    if total_duration > stop_at:
+                        log.info(f"[{self.session_id}] At 90% of target, stopping")
+                        for pending in futures:
+                            pending.cancel()
+                
+                if unused:
+                    with self.lock:
+                        queue.extendleft(reversed(unused))
         
         log.info(f"[{self.session_id}] Collected {len(collected_tracks)} {queue_type} tracks = {total_duration:.1f}s")
         return collected_tracks
 
-    def _concat(self, tracks, output_path):
-        """Concatenate audio tracks"""
+    def _start_concat(self, tracks, output_path, fifo, err_file, mono=False):
+        """Start decoding tracks ONCE to PCM: a WAV for QUICK/FINAL plus raw PCM into `fifo`.
+        
+        The FIFO side lets the IMMEDIATE mix run while the decode is still in
+        flight instead of waiting for the WAV to be finished. `mono` keeps only
+        the left channel (speech).
+        """
         if not tracks:
-            return False
+            return None
         
-        list_file = output_path.parent / f"{output_path.stem}_list.txt"
         try:
-            with open(list_file, 'w') as f:
-                for track in tracks:
-                    f.write(f"file '{track.resolve()}'\n")
+            # Cache hits: every collected track was probed by _fetch_track in the download pool
+            streams = {self._probe_stream(t) for t in tracks}
             
+            if len(streams) == 1:
+                # Uniform codec/rate/layout - concat demuxer reads the list from stdin
+                concat_list = ''.join(f"file '{track.resolve()}'\n" for track in tracks)
+                inputs = ['-f', 'concat', '-safe', '0', '-protocol_whitelist', 'file,pipe', '-i', 'pipe:0']
+                graph = ['-map', '0:a', *(['-af', SPEECH_DOWNMIX] if mono else [])]
+            else:
+                # Mixed sources - decode each track and join with the concat filter
+                log.info(f"[{self.session_id}] Mixed source formats ({len(streams)}), using concat filter")
+                concat_list = None
+                inputs = []
+                chains = []
+                for i, track in enumerate(tracks):
+                    inputs += ['-i', str(track)]
+                    chains.append(f'[{i}:a]aformat=sample_rates=44100:channel_layouts=stereo[a{i}]')
+                labels = ''.join(f'[a{i}]' for i in range(len(tracks)))
+                downmix = f',{SPEECH_DOWNMIX}' if mono else ''
+                graph = [
+                    '-filter_complex', ';'.join(chains) + f';{labels}concat=n={len(tracks)}:v=0:a=1{downmix}[out]',
+                    '-map', '[out]'
+                ]
+            
+            # onfail=ignore: the mix stops reading at the shorter source, the WAV must still complete
             cmd = [
-                'ffmpeg', '-y', '-f', 'concat', '-safe', '0',
-                '-i', str(list_file), '-c', 'copy', str(output_path)
+                FFMPEG, '-y', '-loglevel', 'error', *inputs, *graph, '-vn',
+                '-c:a', 'pcm_s16le', '-ar', '44100', '-ac', '1' if mono else '2',
+                '-f', 'tee', f"[f=wav]{output_path}|[f=s16le:onfail=ignore]{fifo}"
+            ]
+            
+            process = subprocess.Popen(
+                cmd, stdin=subprocess.PIPE if concat_list else subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL, stderr=err_file, text=True, close_fds=False
+            )
+            if concat_list:
+                # A few KB at most - fits the pipe buffer, so this never blocks
+                process.stdin.write(concat_list)
+                process.stdin.close()
+            return process
+        except Exception as e:
+            self._log_error(f"Concat error: {e}", exc=True)
+            return None
+
+    def _watch_concat(self, process, fifo, err_file, kind, failed, mix_done):
+        """Record a concat that exits non-zero while the IMMEDIATE mix runs, and give the mix an
+        empty writer on its FIFO so a blocked open()/read() sees EOF and ffmpeg exits"""
+        if process.wait() == 0 or mix_done.is_set():
+            return
+        failed.append((kind, err_file))
+        log.warning(f"[{self.session_id}] {kind} concat exited with {process.returncode}, aborting IMMEDIATE mix")
+        while not mix_done.is_set():
+            try:
+                os.close(os.open(fifo, os.O_WRONLY | os.O_NONBLOCK))
+                return
+            except OSError:
+                mix_done.wait(0.1)  # ENXIO: the mix hasn't opened this FIFO for reading yet
+
+    def _concat_and_mix_immediate(self, index, m_tracks, s_tracks, m_concat, s_concat):
+        """Decode both sources and pipe them straight into the IMMEDIATE mix"""
+        m_fifo = self.my_scratch_dir / f"m_{index}.pcm"
+        s_fifo = self.my_scratch_dir / f"s_{index}.pcm"
+        concats = []
+        err_files = []
+        try:
+            for fifo in (m_fifo, s_fifo):
+                fifo.unlink(missing_ok=True)
+                os.mkfifo(fifo)
+            
+            err_files = [tempfile.TemporaryFile(dir=self.my_scratch_dir) for _ in range(2)]
+            concats = [
+                self._start_concat(m_tracks, m_concat, m_fifo, err_files[0]),
+                self._start_concat(s_tracks, s_concat, s_fifo, err_files[1], mono=True),
             ]
+            if None in concats:
+                return None
+            
+            # A concat that dies before its tee opens the FIFO would leave the mix blocked in open()
+            # until the watchdog fires - watch both and unblock the mix as soon as one fails
+            failed = []
+            mix_done = threading.Event()
+            for process, fifo, err_file, kind in zip(concats, (m_fifo, s_fifo), err_files, ('Music', 'Speech')):
+                threading.Thread(
+                    target=self._watch_concat, args=(process, fifo, err_file, kind, failed, mix_done),
+                    daemon=True
+                ).start()
             
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            list_file.unlink(missing_ok=True)
+            immediate_path = self._prepare_immediate_mix(index, m_fifo, s_fifo)
+            mix_done.set()
+            
+            if failed:
+                # The mix saw EOF on a dead input - whatever it produced is truncated
+                kind, err_file = failed[0]
+                self._log_error(f"{kind} concat failed: {_read_tail(err_file)[-200:]}")
+                if immediate_path:
+                    Path(immediate_path).unlink(missing_ok=True)
+                return None
+            if not immediate_path:
+                return None
             
-            if result.returncode == 0:
+            # Let the WAVs finish - QUICK/FINAL need the full decode
+            for process, err_file, tracks in zip(concats, err_files, (m_tracks, s_tracks)):
+                if process.wait() != 0:
+                    self._log_error(f"Concat failed: {_read_tail(err_file)[-200:]}")
+                    Path(immediate_path).unlink(missing_ok=True)
+                    return None
                 log.info(f"[{self.session_id}] Concatenated {len(tracks)} tracks")
-                return True
-            else:
-                self._log_error(f"Concat failed: {result.stderr[:200]}")
-                return False
+            
+            return immediate_path
         except Exception as e:
             self._log_error(f"Concat error: {e}", exc=True)
-            return False
+            return None
+        finally:
+            # A writer still blocked on its FIFO would never exit on its own
+            for process in concats:
+                if not process:
+                    continue
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+            for err_file in err_files:
+                err_file.close()
+            for path in (m_fifo, s_fifo):
+                path.unlink(missing_ok=True)
 
     def _update_progress(self, index, stage, percent=None):
         """Update progress for UI"""
-        with self.lock:
-            if index not in self.mix_progress:
-                self.mix_progress[index] = {}
-            self.mix_progress[index]['stage'] = stage
+        with self.progress_lock:
+            entry = dict(self.mix_progress.get(index, {}), stage=stage)
             if percent is not None:
-                self.mix_progress[index]['percent'] = percent
+                entry['percent'] = percent
+            self.mix_progress = {**self.mix_progress, index: entry}
+            self.progress_changed.notify_all()
+
+    def _chunk_still_needed(self, index):
+        """True while chunk `index` is current or still waiting to be played (and the worker runs)"""
+        with self.lock:
+            return self.running and index >= self.chunk_index
+
+    def _run_mix(self, cmd, index, stage, timeout=None, cancel_if_stale=False):
+        """Run an ffmpeg mix, reporting real progress parsed from `-progress pipe:1`.
+        Returns (returncode, stderr); returncode is None when cancelled as stale"""
+        cmd = cmd[:1] + ['-progress', 'pipe:1', '-nostats', '-loglevel', 'error'] + cmd[1:]
+        total_us = self.target_chunk_duration * 1_000_000
+        
+        with tempfile.TemporaryFile(dir=self.my_scratch_dir) as err_file, \
+                subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err_file, text=True, close_fds=False) as process:
+            watchdog = threading.Timer(timeout, process.kill) if timeout else None
+            if watchdog:
+                watchdog.start()
+            
+            try:
+                last_percent = 0
+                # stdout carries only key=value progress lines - draining it is the wait loop
+                for line in process.stdout:
+                    key, _, value = line.strip().partition('=')
+                    if key == 'out_time_us' and value.isdigit():
+                        percent = min(99, int(int(value) * 100 / total_us))
+                        if percent != last_percent:
+                            self._update_progress(index, stage, percent)
+                            if percent // 10 != last_percent // 10:
+                                log.info(f"[{self.session_id}] [CHUNK {index}] {stage} {percent}%")
+                            last_percent = percent
+                    elif key == 'progress':
+                        if value == 'end':
+                            break
+                        # Once per progress block (~0.5s): drop work for a chunk already played
+                        if cancel_if_stale and not self._chunk_still_needed(index):
+                            process.terminate()
+                            process.wait()
+                            return None, ''
+                
+                process.wait()
+                return process.returncode, _read_tail(err_file) if process.returncode else ''
+            finally:
+                if watchdog:
+                    watchdog.cancel()
 
-    def _prepare_immediate_mix(self, index, m_concat, s_concat):
+    def _prepare_immediate_mix(self, index, m_fifo, s_fifo):
         """IMMEDIATE: 5-10 seconds, NO normalization, WITH LIMITER"""
         self._update_progress(index, 'immediate_mix', 0)
         
-        immediate_path = self.my_chunk_dir / f"{index}_immediate.mp3"
-        
-        vocal_eq = (
-            'equalizer=f=100:width_type=o:width=2:g=-6,'
-            'equalizer=f=800:width_type=o:width=2:g=4,'
-            'equalizer=f=2000:width_type=o:width=2:g=6,'
-            'equalizer=f=8000:width_type=o:width=2:g=-4'
-        )
+        immediate_path = self.my_scratch_dir / f"{index}_immediate.mp3"
         
         # ADD HARD LIMITER to prevent clipping
         filter_complex = (
             f'[0:a]volume=0.4[m];'
-            f'[1:a]highpass=f=80,{vocal_eq}[s];'
+            f'[1:a]highpass=f=80,{VOCAL_EQ},{SPEECH_UPMIX}[s];'
             f'[m][s]amix=inputs=2:duration=shortest:dropout_transition=2,'
             f'alimiter=limit=0.9:attack=5:release=50[out]'  # LIMITER prevents clipping
         )
         
         cmd = [
-            'ffmpeg', '-y', '-i', str(m_concat), '-i', str(s_concat),
+            FFMPEG, '-y', *MIX_THREADS,
+            *PCM_INPUT, '-i', str(m_fifo),
+            *SPEECH_PCM_INPUT, '-i', str(s_fifo),
             '-filter_complex', filter_complex, '-map', '[out]',
-            '-c:a', 'libmp3lame', '-b:a', '128k',
-            str(immediate_path)
+            *IMMEDIATE_ENCODE, '-f', 'mp3',
+            str(_part_path(immediate_path))
         ]
         
         log.info(f"[{self.session_id}] Creating IMMEDIATE mix (with limiter)...")
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+            returncode, stderr = self._run_mix(cmd, index, 'immediate_mix', timeout=600)
             
-            if result.returncode != 0:
-                self._log_error(f"Immediate mix failed: {result.stderr[:300]}")
+            if returncode != 0:
+                self._log_error(f"Immediate mix failed: {stderr[:300]}")
                 return None
             
+            # Only complete files ever appear under the published name
+            os.replace(_part_path(immediate_path), immediate_path)
             self._update_progress(index, 'immediate_mix', 100)
             log.info(f"[{self.session_id}] ⚡ IMMEDIATE mix ready: {immediate_path.stat().st_size / 1024 / 1024:.1f}MB")
             return str(immediate_path)
@@ -259,45 +704,45 @@ class AudioWorker:
         except Exception as e:
             self._log_error(f"Immediate mix error: {e}", exc=True)
             return None
+        finally:
+            _part_path(immediate_path).unlink(missing_ok=True)
 
     def _prepare_quick_mix(self, index, m_concat, s_concat):
         """QUICK: Fast normalization WITH LIMITER"""
         self._update_progress(index, 'quick_mix', 0)
         
-        quick_path = self.my_chunk_dir / f"{index}_quick.mp3"
-        
-        vocal_eq = (
-            'equalizer=f=100:width_type=o:width=2:g=-6,'
-            'equalizer=f=800:width_type=o:width=2:g=4,'
-            'equalizer=f=2000:width_type=o:width=2:g=6,'
-            'equalizer=f=8000:width_type=o:width=2:g=-4'
-        )
+        quick_path = self.my_scratch_dir / f"{index}_quick.mp3"
         
         # WITH LIMITER
         filter_complex = (
             f'[0:a]dynaudnorm=f=150:g=11:r=0.9[m_norm];'
             f'[m_norm]volume=0.4[m_ready];'
-            f'[1:a]highpass=f=80,{vocal_eq},dynaudnorm=f=200:g=15:r=0.9[s_ready];'
+            f'[1:a]highpass=f=80,{VOCAL_EQ},dynaudnorm=f=200:g=15:r=0.9,{SPEECH_UPMIX}[s_ready];'
             f'[m_ready][s_ready]amix=inputs=2:duration=shortest:dropout_transition=2,'
             f'alimiter=limit=0.9:attack=5:release=50[out]'  # LIMITER
         )
         
         cmd = [
-            'ffmpeg', '-y', '-i', str(m_concat), '-i', str(s_concat),
+            FFMPEG, '-y', *MIX_THREADS, '-i', str(m_concat), '-i', str(s_concat),
             '-filter_complex', filter_complex, '-map', '[out]',
-            '-c:a', 'libmp3lame', '-b:a', '128k',
-            str(quick_path)
+            *MP3_ENCODE, '-f', 'mp3',
+            str(_part_path(quick_path))
         ]
         
         log.info(f"[{self.session_id}] Creating QUICK mix (with limiter)...")
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=6000)
+            returncode, stderr = self._run_mix(cmd, index, 'quick_mix', timeout=6000, cancel_if_stale=True)
+            
+            if returncode is None:
+                log.info(f"[{self.session_id}] [CHUNK {index}] Already played, cancelled QUICK mix")
+                return None
             
-            if result.returncode != 0:
-                self._log_error(f"Quick mix failed: {result.stderr[:300]}")
+            if returncode != 0:
+                self._log_error(f"Quick mix failed: {stderr[:300]}")
                 return None
             
+            os.replace(_part_path(quick_path), quick_path)
             self._update_progress(index, 'quick_mix', 100)
             log.info(f"[{self.session_id}] ✓ QUICK mix ready: {quick_path.stat().st_size / 1024 / 1024:.1f}MB")
             return str(quick_path)
@@ -305,134 +750,216 @@ class AudioWorker:
         except Exception as e:
             self._log_error(f"Quick mix error: {e}", exc=True)
             return None
+        finally:
+            _part_path(quick_path).unlink(missing_ok=True)
 
     def _prepare_final_mix(self, index, m_concat, s_concat):
-        """FINAL: LUFS normalization - SERIALIZED, only ONE at a time globally"""
+        """FINAL: LUFS normalization - gated by the global LUFS_SEM slot budget"""
         
-        # WAIT for LUFS lock - only one LUFS process at a time
-        log.info(f"[{self.session_id}] Chunk {index} waiting for LUFS lock...")
+        # WAIT for a LUFS slot - at most LUFS_SLOTS run across all workers
+        log.info(f"[{self.session_id}] Chunk {index} waiting for LUFS slot...")
         
-        with LUFS_LOCK:
-            log.info(f"[{self.session_id}] Chunk {index} acquired LUFS lock - starting FINAL mix")
+        with LUFS_SEM:
+            # Pool threads outlive a stopped session - don't spend the slot on a dead chunk
+            if not self._chunk_still_needed(index):
+                return None
+            log.info(f"[{self.session_id}] Chunk {index} acquired LUFS slot - starting FINAL mix")
             
-            with self.lock:
-                self.lufs_in_progress.add(index)
+            with self.progress_lock:
+                self.lufs_in_progress = self.lufs_in_progress | {index}
             
-            self._update_progress(index, 'final_mix', 0)
+            try:
+                return self._run_final_mix(index, m_concat, s_concat)
+            finally:
+                with self.progress_lock:
+                    self.lufs_in_progress = self.lufs_in_progress - {index}
+
+    def _measure_loudness(self, path, loudnorm, prefilter=None, head_seconds=120):
+        """Measure a short head sample so FINAL can run loudnorm as one linear pass.
+        Returns the extra measured_* loudnorm options, or None to fall back to dynamic mode"""
+        af = f'{prefilter},' if prefilter else ''
+        af += f'{loudnorm}:print_format=json'
+        cmd = [
+            FFMPEG, '-hide_banner', '-nostats', '-ss', '0', '-t', str(head_seconds),
+            '-i', str(path), '-af', af, '-f', 'null', '-'
+        ]
+        try:
+            with subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                  text=True, close_fds=False) as process:
+                # Wait in short slices so a stopped worker doesn't hold shutdown for the full timeout
+                deadline = time.monotonic() + 300
+                while True:
+                    try:
+                        _, stderr = process.communicate(timeout=1)
+                        break
+                    except subprocess.TimeoutExpired:
+                        if not self.running or time.monotonic() > deadline:
+                            process.kill()
+                            process.communicate()
+                            return None
+            report = stderr[stderr.rindex('{'):]
+            stats = json.loads(report[:report.rindex('}') + 1])
+            measured = [stats[k] for k in ('input_i', 'input_tp', 'input_lra', 'input_thresh', 'target_offset')]
+            if any('inf' in v for v in measured):
+                return None  # silent head sample - nothing usable to measure
+            return (
+                f'measured_I={measured[0]}:measured_TP={measured[1]}:measured_LRA={measured[2]}:'
+                f'measured_thresh={measured[3]}:offset={measured[4]}:linear=true'
+            )
+        except Exception as e:
+            log.warning(f"[{self.session_id}] Loudness measurement failed for {path.name}: {e}")
+            return None
+
+    def _run_final_mix(self, index, m_concat, s_concat):
+        """Build and run the FINAL LUFS mix - caller holds a LUFS slot"""
+        self._update_progress(index, 'final_mix', 0)
+        
+        final_path = self.my_chunk_dir / f"{index}.mp3"
+        
+        music_loudnorm = 'loudnorm=I=-20:TP=-2:LRA=11'
+        # Upmix before loudnorm: targets were tuned on the dual-mono signal
+        speech_prefilter = f'highpass=f=80,{SPEECH_UPMIX}'
+        speech_loudnorm = 'loudnorm=I=-16:TP=-1.5:LRA=11'
+        
+        # Head-sample measurement turns each loudnorm into a single linear pass
+        m_measured = self._measure_loudness(m_concat, music_loudnorm)
+        s_measured = self._measure_loudness(s_concat, speech_loudnorm, prefilter=speech_prefilter)
+        if m_measured:
+            music_loudnorm += f':{m_measured}'
+        if s_measured:
+            speech_loudnorm += f':{s_measured}'
+        
+        # LUFS with limiter
+        filter_complex = (
+            f'[0:a]{music_loudnorm}[m_norm];'
+            f'[m_norm]volume=0.55[m_ready];'
+            f'[1:a]{speech_prefilter},{speech_loudnorm}[s_ready];'
+            f'[m_ready][s_ready]amix=inputs=2:duration=shortest:dropout_transition=2[mixed];'
+            f'[mixed]alimiter=limit=0.9:attack=5:release=50[out]'
+        )
+        
+        cmd = [
+            FFMPEG, '-y', *MIX_THREADS, '-i', str(m_concat), '-i', str(s_concat),
+            '-filter_complex', filter_complex, '-map', '[out]',
+            *MP3_ENCODE, '-f', 'mp3',
+            str(_part_path(final_path))
+        ]
+        
+        log.info(f"[{self.session_id}] [CHUNK {index}] Starting LUFS processing...")
+        start_time = time.time()
+        
+        try:
+            returncode, stderr = self._run_mix(cmd, index, 'final_mix', cancel_if_stale=True)
             
-            final_path = self.my_chunk_dir / f"{index}.mp3"
+            if returncode is None:
+                log.info(f"[{self.session_id}] [CHUNK {index}] Already played, cancelled FINAL mix")
+                return None
             
-            # LUFS with limiter
-            filter_complex = (
-                f'[0:a]loudnorm=I=-20:TP=-2:LRA=11:print_format=summary[m_norm];'
-                f'[m_norm]volume=0.55[m_ready];'
-                f'[1:a]highpass=f=80,pan=stereo|c0=c0|c1=c0,'
-                f'loudnorm=I=-16:TP=-1.5:LRA=11:print_format=summary[s_ready];'
-                f'[m_ready][s_ready]amix=inputs=2:duration=shortest:dropout_transition=2[mixed];'
-                f'[mixed]alimiter=limit=0.9:attack=5:release=50[out]'
-            )
+            if returncode != 0:
+                self._log_error(f"[CHUNK {index}] FINAL mix failed with code {returncode}: {stderr[:300]}")
+                return None
             
-            cmd = [
-                'ffmpeg', '-y', '-i', str(m_concat), '-i', str(s_concat),
-                '-filter_complex', filter_complex, '-map', '[out]',
-                '-c:a', 'libmp3lame', '-b:a', '128k',
-                str(final_path)
-            ]
+            os.replace(_part_path(final_path), final_path)
+            elapsed = time.time() - start_time
+            self._update_progress(index, 'final_mix', 100)
+            file_size = final_path.stat().st_size / 1024 / 1024
+            log.info(f"[{self.session_id}] [CHUNK {index}] ✨ FINAL LUFS mix done in {elapsed:.0f}s ({file_size:.1f}MB)")
             
-            log.info(f"[{self.session_id}] [CHUNK {index}] Starting LUFS processing...")
-            start_time = time.time()
+            return str(final_path)
             
-            try:
-                # FIX: Use Popen but read continuously to prevent buffer deadlock
-                process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    bufsize=1  # Line buffered
-                )
-                
-                # Helper to read stderr without blocking main thread logic
-                def reader(pipe, log_list):
-                    for line in pipe:
-                        # We can parse progress here if we want, but mostly we just need to DRAIN the pipe
-                        # FFmpeg outputs to stderr.
-                        if "time=" in line:
-                            log_list.append(line) 
-
-                # Store last status line
-                status_bucket = []
-                reader_thread = threading.Thread(target=reader, args=(process.stderr, status_bucket))
-                reader_thread.daemon = True
-                reader_thread.start()
-                
-                # Main loop monitors the process
-                while True:
-                    if process.poll() is not None:
-                        break
-                    
-                    elapsed = time.time() - start_time
-                    
-                    # Log every 30 seconds
-                    if int(elapsed) % 30 == 0 and int(elapsed) > 0:
-                        # Try to find duration in status bucket to calc real %
-                        current_status = status_bucket[-1] if status_bucket else "Processing..."
-                        log.info(f"[{self.session_id}] [CHUNK {index}] LUFS Running... ({elapsed:.0f}s)")
-                        
-                        # Fake progress for now since LUFS 2-pass is hard to predict
-                        progress = min(95, int((elapsed / 300) * 100))
-                        self._update_progress(index, 'final_mix', progress)
-                        
-                        # Empty bucket to save RAM
-                        if len(status_bucket) > 10:
-                            status_bucket[:] = status_bucket[-1:]
-                            
-                    time.sleep(1)
-                
-                # Process finished
-                reader_thread.join(timeout=5)
-                
-                if process.returncode != 0:
-                    # Read any remaining error output
-                    err_out = process.stderr.read() if process.stderr else "Unknown error"
-                    self._log_error(f"[CHUNK {index}] FINAL mix failed with code {process.returncode}")
-                    return None
-                
-                elapsed = time.time() - start_time
-                self._update_progress(index, 'final_mix', 100)
-                file_size = final_path.stat().st_size / 1024 / 1024
-                log.info(f"[{self.session_id}] [CHUNK {index}] ✨ FINAL LUFS mix done in {elapsed:.0f}s ({file_size:.1f}MB)")
-                
-                with self.lock:
-                    self.lufs_in_progress.discard(index)
-                
-                return str(final_path)
-                
-            except Exception as e:
-                self._log_error(f"[CHUNK {index}] FINAL mix error: {e}", exc=True)
-                with self.lock:
-                    self.lufs_in_progress.discard(index)
-                return None
+        except Exception as e:
+            self._log_error(f"[CHUNK {index}] FINAL mix error: {e}", exc=True)
+            return None
+        finally:
+            _part_path(final_path).unlink(missing_ok=True)
+
+    def _scratch_has_room(self):
+        """Check that another chunk's decoded PCM (stereo music + mono speech WAV) fits the scratch budget"""
+        try:
+            in_use = sum(f.stat().st_size for f in self.my_scratch_dir.iterdir() if f.is_file())
+        except OSError:
+            in_use = 0
+        needed = self.target_chunk_duration * (PCM_BYTES_PER_SEC + SPEECH_PCM_BYTES_PER_SEC)
+        
+        # Always allow one chunk when scratch is empty so a small budget can't stall playback
+        if in_use == 0 or in_use + needed <= self.max_scratch_bytes:
+            return True
+        
+        log.debug(f"[{self.session_id}] Scratch budget full ({in_use // 2**20} MB in use), deferring next chunk")
+        return False
+
+    def _trim_audio_cache(self):
+        """Evict least-recently-used downloads once the track cache exceeds its cap"""
+        try:
+            entries = []
+            for path in self.my_audio_dir.iterdir():
+                st = path.stat()
+                entries.append((st.st_mtime, st.st_size, path))
+        except OSError:
+            return
+        
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_audio_cache_bytes:
+            return
+        
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            path.unlink(missing_ok=True)
+            self._probe_cache.pop(str(path), None)
+            total -= size
+            if total <= self.max_audio_cache_bytes:
+                break
+        log.info(f"[{self.session_id}] Trimmed audio cache to {total // 2**20} MB")
 
     def _background_loop(self):
         """Main loop: keeps 2 chunks preloaded"""
         while self.running:
+            # Clear before checking so a notify during the check isn't lost
+            self._needs_chunk.clear()
+            self._drain_deletions()
             with self.lock:
                 should_prepare = len(self.preloaded_chunks) < 2
                 if should_prepare:
                     next_idx = self.chunk_index + len(self.preloaded_chunks) + 1
             
+            if should_prepare and not self._scratch_has_room():
+                should_prepare = False
+            
             if should_prepare:
                 try:
+                    # Safe here: no collector or concat of this session is reading tracks
+                    self._trim_audio_cache()
                     chunk_info = self.prepare_chunk(next_idx)
                     if chunk_info:
                         with self.lock:
                             self.preloaded_chunks.append(chunk_info)
-                            log.info(f"[{self.session_id}] Preloaded chunk {chunk_info['index']}")
+                            self.chunk_ready.notify_all()
+                        log.info(f"[{self.session_id}] Preloaded chunk {chunk_info['index']}")
+                        continue
                 except Exception as e:
                     self._log_error(f"Chunk prep error: {e}", exc=True)
             
-            time.sleep(5)
+            # Idle until a consumer pops a chunk; failed preps retry after a short backoff
+            self._needs_chunk.wait(timeout=5 if should_prepare else 30)
+
+    def notify_consumed(self):
+        """Wake the background loop after a preloaded chunk was taken"""
+        self._needs_chunk.set()
+
+    def discard_chunk(self, path):
+        """Queue a consumed chunk for deletion off the request path"""
+        self.pending_deletions.append(path)
+
+    def _drain_deletions(self):
+        """Unlink consumed chunks queued by discard_chunk()"""
+        while self.pending_deletions:
+            path = self.pending_deletions.popleft()
+            try:
+                os.unlink(path)
+                log.info(f"[{self.session_id}] Cleaned up old chunk")
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                log.warning(f"[{self.session_id}] Failed to clean up: {e}")
 
     def prepare_chunk(self, index):
         """THREE-TIER preparation: IMMEDIATE → QUICK → FINAL"""
@@ -459,37 +986,26 @@ class AudioWorker:
                 s_error.append(e)
                 self._log_error(f"Speech collection failed: {e}", exc=True)
         
-        music_thread = threading.Thread(target=collect_music)
-        speech_thread = threading.Thread(target=collect_speech)
-        
-        music_thread.start()
-        speech_thread.start()
-        
-        music_thread.join()
-        speech_thread.join()
+        collectors = [COLLECT_POOL.submit(collect_music), COLLECT_POOL.submit(collect_speech)]
+        for future in collectors:
+            future.result()  # Errors are captured in m_error/s_error
         
         if m_error or s_error or not m_tracks or not s_tracks:
             self._log_error(f"Failed to collect tracks for chunk {index}")
             return None
 
-        # Temp files
-        m_concat = self.my_chunk_dir / f"m_tmp_{index}.mp3"
-        s_concat = self.my_chunk_dir / f"s_tmp_{index}.mp3"
+        # Decoded PCM shared by all three tiers (lives in RAM-backed scratch)
+        m_concat = self.my_scratch_dir / f"m_tmp_{index}.wav"
+        s_concat = self.my_scratch_dir / f"s_tmp_{index}.wav"
 
-        # Concatenate
+        # Concatenate + decode once; 1. IMMEDIATE mix reads the decode as it streams
         self._update_progress(index, 'concatenating', 0)
-        if not self._concat(m_tracks, m_concat) or not self._concat(s_tracks, s_concat):
-            return None
-        
-        # 1. IMMEDIATE mix
-        immediate_path = self._prepare_immediate_mix(index, m_concat, s_concat)
+        immediate_path = self._concat_and_mix_immediate(index, m_tracks, s_tracks, m_concat, s_concat)
     
         if not immediate_path:
             self._log_error(f"Immediate mix failed for chunk {index}")
             m_concat.unlink(missing_ok=True)
             s_concat.unlink(missing_ok=True)
-            for t in m_tracks + s_tracks: 
-                t.unlink(missing_ok=True)
             return None
         
         log.info(f"[{self.session_id}] ⚡ Chunk {index} ready for streaming")
@@ -499,95 +1015,121 @@ class AudioWorker:
             try:
                 log.info(f"[{self.session_id}] Starting upgrade pipeline for chunk {index}")
                 
-                # QUICK mix
-                quick_path = self._prepare_quick_mix(index, m_concat, s_concat)
+                # QUICK mix - skipped if the chunk was already played past
+                quick_path = None
+                if self._chunk_still_needed(index):
+                    quick_path = self._prepare_quick_mix(index, m_concat, s_concat)
+                else:
+                    log.info(f"[{self.session_id}] Chunk {index} already consumed, skipping upgrades")
                 
                 if quick_path:
                     with self.lock:
-                        if self.current_chunk_path == immediate_path:
-                            log.info(f"[{self.session_id}] Upgrading current chunk to QUICK")
+                        upgraded_current = self.current_chunk_path == immediate_path
+                        if upgraded_current:
                             self.current_chunk_path = quick_path
                             self.current_chunk_quality = 'quick'
+                            self.chunk_ready.notify_all()
                         
                         for i, chunk_info in enumerate(self.preloaded_chunks):
                             if chunk_info['path'] == immediate_path:
                                 self.preloaded_chunks[i] = {
                                     'path': quick_path,
                                     'quality': 'quick',
-                                    'index': index
+                                    'index': index,
+                                    'ready': True
                                 }
                                 break
                     
+                    # Log outside the lock - /stream and /next wait on it
+                    if upgraded_current:
+                        log.info(f"[{self.session_id}] Upgraded current chunk to QUICK")
                     if immediate_path:
                         Path(immediate_path).unlink(missing_ok=True)
                     log.info(f"[{self.session_id}] ✓ Upgraded to QUICK mix")
                     
-                    # FINAL mix - ONLY if not too many in progress
-                    with self.lock:
-                        lufs_count = len(self.lufs_in_progress)
-                    
-                    if lufs_count >= 2:
-                        log.warning(f"[{self.session_id}] Skipping FINAL mix for chunk {index} - {lufs_count} LUFS already in progress")
+                    # FINAL mix - LUFS_SEM bounds how many run at once
+                    if not self._chunk_still_needed(index):
+                        log.info(f"[{self.session_id}] Chunk {index} already consumed, skipping FINAL mix")
                     else:
                         log.info(f"[{self.session_id}] Starting FINAL mix for chunk {index}")
                         final_path = self._prepare_final_mix(index, m_concat, s_concat)
                         
                         if final_path:
                             with self.lock:
-                                if self.current_chunk_path == quick_path:
-                                    log.info(f"[{self.session_id}] Upgrading current chunk to FINAL")
+                                upgraded_current = self.current_chunk_path == quick_path
+                                if upgraded_current:
                                     self.current_chunk_path = final_path
                                     self.current_chunk_quality = 'final'
+                                    self.chunk_ready.notify_all()
                                 
                                 for i, chunk_info in enumerate(self.preloaded_chunks):
                                     if chunk_info['path'] == quick_path:
                                         self.preloaded_chunks[i] = {
                                             'path': final_path,
                                             'quality': 'final',
-                                            'index': index
+                                            'index': index,
+                                            'ready': True
                                         }
                                         break
                             
+                            if upgraded_current:
+                                log.info(f"[{self.session_id}] Upgraded current chunk to FINAL")
                             Path(quick_path).unlink(missing_ok=True)
                             log.info(f"[{self.session_id}] ✨ Upgraded to FINAL mix")
                 
                 # Cleanup
                 m_concat.unlink(missing_ok=True)
                 s_concat.unlink(missing_ok=True)
-                for t in m_tracks + s_tracks: 
-                    t.unlink(missing_ok=True)
+                # Scratch space just freed - a deferred chunk may fit now
+                self._needs_chunk.set()
                     
                 log.info(f"[{self.session_id}] Upgrade pipeline complete for chunk {index}")
                 
             except Exception as e:
                 self._log_error(f"Upgrade pipeline error for chunk {index}: {e}", exc=True)
         
-        threading.Thread(target=upgrade_pipeline, daemon=True).start()
+        UPGRADE_POOL.submit(upgrade_pipeline)
         
         return {
             'path': immediate_path,
             'quality': 'immediate',
-            'index': index
+            'index': index,
+            'ready': True  # ffmpeg has exited - file is complete
         }
     
     def stop(self):
-        """Stop worker"""
+        """Stop worker and drop its scratch intermediates"""
         self.running = False
+        self._needs_chunk.set()
         if self.thread.is_alive():
             self.thread.join(timeout=5)
+        self._drain_deletions()
+        shutil.rmtree(self.my_scratch_dir, ignore_errors=True)
+        
+        ydl_flat, self._ydl_flat = self._ydl_flat, None
+        if ydl_flat is None:
+            pass  # Already stopped
+        elif self.thread.is_alive():
+            ydl_flat.close()  # Loop didn't exit in time - never share it with another worker
+        else:
+            _YDL_FLAT_POOL.put(ydl_flat)
+        for idle in self._ydl_idle.values():
+            while not idle.empty():
+                idle.get_nowait().close()
     
     def get_status(self):
-        """Get status"""
-        with self.lock:
-            return {
-                "chunk_index": self.chunk_index,
-                "current_chunk": self.current_chunk_path,
-                "current_chunk_quality": self.current_chunk_quality,
-                "preloaded_count": len(self.preloaded_chunks),
-                "music_queue_size": len(self.music_queue),
-                "speech_queue_size": len(self.speech_queue),
-                "mix_progress": dict(self.mix_progress),
-                "errors": self.error_log[-5:],
-                "lufs_in_progress": len(self.lufs_in_progress),  # NEW
-                "lufs_chunks": list(self.lufs_in_progress)  # NEW
-            }
\ No newline at end of file
+        """Get status (lock-free: every field is a single atomic read or an immutable snapshot)"""
+        current_chunk = self.current_chunk_path
+        lufs_in_progress = self.lufs_in_progress
+        return {
+            "chunk_index": self.chunk_index,
+            "current_chunk": str(current_chunk) if current_chunk else None,
+            "current_chunk_quality": self.current_chunk_quality,
+            "preloaded_count": len(self.preloaded_chunks),
+            "music_queue_size": len(self.music_queue),
+            "speech_queue_size": len(self.speech_queue),
+            "mix_progress": self.mix_progress,
+            "errors": self.error_log[-5:],
+            "lufs_in_progress": len(lufs_in_progress),
+            "lufs_chunks": sorted(lufs_in_progress)
+        }
\ No newline at end of file
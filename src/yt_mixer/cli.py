@@ -5,18 +5,40 @@ YT Mixer CLI - Command-line interface for managing the audio mixer
 import sys
 import os
 import argparse
+import ctypes
+import ctypes.util
+import logging
+import re
+import signal
 import subprocess
 import shutil
+import time
+import traceback
 from pathlib import Path
 
 # Import config but NOT routes (which creates manager instance)
-from .config import config, DATA_DIR, CHUNK_DIR, AUDIO_DIR
+from .config import config, DATA_DIR, CHUNK_DIR, AUDIO_DIR, SHARED_AUDIO_DIR
+from .port_finder import get_available_port, serve_app
+
+SERVICE_NAME = "yt-mixer.service"
+SYSTEMCTL = shutil.which("systemctl") or "systemctl"
+# (argparse flag / systemctl verb, message on success)
+SERVICE_ACTIONS = (
+    ('status', None),
+    ('start', "✓ Service started"),
+    ('stop', "✓ Service stopped"),
+    ('restart', "✓ Service restarted"),
+    ('enable', "✓ Service enabled (will start on boot)"),
+    ('disable', "✓ Service disabled"),
+)
+
+# Config values that should be stored as numbers (e.g. 5052, -1, 0.4)
+_NUM_RE = re.compile(r'^-?\d+(?:\.\d+)?$')
 
 def cmd_config(args):
     """Manage configuration"""
     # If no action specified, show help
     if not (args.list or args.set or args.get):
-        import argparse
         parser = argparse.ArgumentParser(prog='yt-mixer config')
         parser.add_argument('--list', action='store_true', help='List all config values')
         parser.add_argument('--get', metavar='KEY', help='Get a config value')
@@ -32,15 +54,20 @@ def cmd_config(args):
         return
     
     if args.set:
-        key, value = args.set.split('=', 1)
-        # Try to convert to appropriate type
-        try:
-            if value.lower() in ('true', 'false'):
-                value = value.lower() == 'true'
-            elif value.replace('.', '').isdigit():
-                value = float(value) if '.' in value else int(value)
-        except:
-            pass
+        key, sep, raw = args.set.partition('=')
+        if not sep or not key:
+            print(f"✗ Expected KEY=VALUE, got '{args.set}'")
+            return 1
+        # Convert to appropriate type
+        low = raw.lower()
+        if low == 'true':
+            value = True
+        elif low == 'false':
+            value = False
+        elif _NUM_RE.match(raw):
+            value = float(raw) if '.' in raw else int(raw)
+        else:
+            value = raw
         
         if config.set(key, value):
             print(f"✓ Set {key} = {value}")
@@ -56,62 +83,108 @@ def cmd_config(args):
             print(f"Key '{args.get}' not found")
             return 1
 
+def _scan_sessions():
+    """List (session_dir, chunk_count, size_bytes) using cached DirEntry stats"""
+    try:
+        with os.scandir(CHUNK_DIR) as it:
+            session_dirs = [e.path for e in it if e.is_dir(follow_symlinks=False)]
+    except FileNotFoundError:
+        return []
+    
+    sessions = []
+    for session_dir in session_dirs:
+        count = 0
+        total = 0
+        with os.scandir(session_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.mp3') and entry.is_file(follow_symlinks=False):
+                    count += 1
+                    total += entry.stat(follow_symlinks=False).st_size
+        sessions.append((Path(session_dir), count, total))
+    return sessions
+
+def _print_sessions(sessions):
+    print(f"Active Sessions ({len(sessions)}):")
+    print("-" * 60)
+    for session_dir, count, total in sessions:
+        print(f"  {session_dir.name}: {count} chunks ({total / (1024 * 1024):.1f} MB)")
+
 def cmd_sessions(args):
     """Manage sessions"""
-    # If no action specified, just list
-    if not args.clean:
-        sessions = list(CHUNK_DIR.glob('*'))
-        
-        if not sessions:
-            print("No active sessions found")
-            return
-        
-        print(f"Active Sessions ({len(sessions)}):")
-        print("-" * 60)
-        
-        for session_dir in sessions:
-            if session_dir.is_dir():
-                chunks = list(session_dir.glob('*.mp3'))
-                size_mb = sum(f.stat().st_size for f in chunks) / (1024 * 1024)
-                print(f"  {session_dir.name}: {len(chunks)} chunks ({size_mb:.1f} MB)")
-        return
-    
-    # Clean action
-    sessions = list(CHUNK_DIR.glob('*'))
+    sessions = _scan_sessions()
     
     if not sessions:
         print("No active sessions found")
         return
     
-    print(f"Active Sessions ({len(sessions)}):")
-    print("-" * 60)
+    _print_sessions(sessions)
+    
+    # If no action specified, just list
+    if not args.clean:
+        return
     
-    for session_dir in sessions:
-        if session_dir.is_dir():
-            chunks = list(session_dir.glob('*.mp3'))
-            size_mb = sum(f.stat().st_size for f in chunks) / (1024 * 1024)
-            print(f"  {session_dir.name}: {len(chunks)} chunks ({size_mb:.1f} MB)")
-    
-    if args.clean:
-        confirm = input("\nDelete all sessions? [y/N]: ")
-        if confirm.lower() == 'y':
-            for session_dir in sessions:
-                if session_dir.is_dir():
-                    shutil.rmtree(session_dir)
-                    print(f"✓ Deleted {session_dir.name}")
-            # Also clean audio cache
-            audio_sessions = list(AUDIO_DIR.glob('*'))
-            for audio_dir in audio_sessions:
-                if audio_dir.is_dir():
-                    shutil.rmtree(audio_dir)
-            print("✓ Cleaned all session data")
+    confirm = input("\nDelete all sessions? [y/N]: ")
+    if confirm.lower() == 'y':
+        for session_dir, _, _ in sessions:
+            shutil.rmtree(session_dir)
+            print(f"✓ Deleted {session_dir.name}")
+        # Also clean audio cache. The shared cache dir itself stays: a running server
+        # indexes it at startup and re-downloads (and re-links) any file missing from it
+        with os.scandir(AUDIO_DIR) as it:
+            audio_dirs = [e.path for e in it if e.is_dir(follow_symlinks=False)]
+        for audio_dir in audio_dirs:
+            if Path(audio_dir) == SHARED_AUDIO_DIR:
+                with os.scandir(audio_dir) as it:
+                    for entry in it:
+                        Path(entry.path).unlink(missing_ok=True)
+            else:
+                shutil.rmtree(audio_dir)
+        print("✓ Cleaned all session data")
+
+def _inotify_watch(path):
+    """Return an inotify fd that becomes readable when `path` changes, or None where unsupported"""
+    IN_MODIFY, IN_DELETE_SELF, IN_MOVE_SELF = 0x002, 0x400, 0x800
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        fd = libc.inotify_init1(os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        if libc.inotify_add_watch(fd, os.fsencode(path), IN_MODIFY | IN_DELETE_SELF | IN_MOVE_SELF) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+def _follow_log(log_file, lines=50):
+    """Print the last lines of the log, then stream appended output (tail -f without a subprocess)"""
+    with open(log_file, 'r', errors='replace') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 64 * 1024))
+        sys.stdout.write(''.join(f.readlines()[-lines:]))
+        sys.stdout.flush()
+        
+        # Watch is registered before the first drain, so writes in between still wake us
+        watch = _inotify_watch(log_file)
+        try:
+            while True:
+                data = f.read()
+                if data:
+                    sys.stdout.write(data)
+                    sys.stdout.flush()
+                if watch is not None:
+                    os.read(watch, 4096)  # Blocks until the file changes
+                else:
+                    time.sleep(1)
+        finally:
+            if watch is not None:
+                os.close(watch)
 
 def cmd_service(args):
     """Manage systemd service"""
     # If no action specified, show help
     if not any([args.status, args.start, args.stop, args.restart, 
                 args.enable, args.disable, args.install, args.logs]):
-        import argparse
         parser = argparse.ArgumentParser(prog='yt-mixer service')
         parser.add_argument('--install', action='store_true', help='Install systemd service')
         parser.add_argument('--status', action='store_true', help='Show service status')
@@ -124,31 +197,13 @@ def cmd_service(args):
         parser.print_help()
         return 1
     
-    service_name = "yt-mixer.service"
-    
-    if args.status:
-        subprocess.run(["systemctl", "--user", "status", service_name])
-    elif args.start:
-        subprocess.run(["systemctl", "--user", "start", service_name])
-        print("✓ Service started")
-    elif args.stop:
-        subprocess.run(["systemctl", "--user", "stop", service_name])
-        print("✓ Service stopped")
-    elif args.restart:
-        subprocess.run(["systemctl", "--user", "restart", service_name])
-        print("✓ Service restarted")
-    elif args.enable:
-        subprocess.run(["systemctl", "--user", "enable", service_name])
-        print("✓ Service enabled (will start on boot)")
-    elif args.disable:
-        subprocess.run(["systemctl", "--user", "disable", service_name])
-        print("✓ Service disabled")
-    elif args.install:
+    if args.install:
         install_systemd_service()
-    elif args.logs:
-        # Get the actual log file path from config
-        from .session_manager import manager
-        log_file = manager.log_file
+        return
+    
+    if args.logs:
+        # Same path setup_logging() writes to - no need to build the session manager for it
+        log_file = DATA_DIR / "yt-mixer.log"
         
         if not log_file.exists():
             print(f"Log file not found: {log_file}")
@@ -157,27 +212,25 @@ def cmd_service(args):
         print(f"Following logs from: {log_file}")
         
         try:
-            process = subprocess.Popen(
-                ['tail', '-f', '-n', '50', str(log_file)],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            for line in iter(process.stdout.readline, ''):
-                sys.stdout.write(line)
-                sys.stdout.flush()
-                
+            _follow_log(log_file)
         except KeyboardInterrupt:
-            if 'process' in locals():
-                process.terminate()
             print("\nStopped following logs.")
             sys.exit(0)
+        return
+    
+    for action, done in SERVICE_ACTIONS:
+        if getattr(args, action):
+            result = _systemctl(action)
+            if done and result.returncode == 0:
+                print(done)
+            return result.returncode or None
+
+def _systemctl(action):
+    """Run one `systemctl --user` action against the yt-mixer unit"""
+    return subprocess.run([SYSTEMCTL, "--user", action, SERVICE_NAME])
 
 def install_systemd_service():
     """Install systemd user service"""
-    import sys
-    from pathlib import Path
     
     # Get the Python executable path
     python_path = sys.executable
@@ -254,22 +307,55 @@ ExecStart={python_path} -m pip install --no-cache-dir --upgrade yt-dlp
     print(f"\nTo enable auto-updates:")
     print(f"  systemctl --user enable --now yt-dlp-update.timer")
 
+def _is_our_pid(pid):
+    """Check the PID still belongs to yt-mixer, not a process that recycled it"""
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            cmdline = f.read()
+    except FileNotFoundError:
+        return not os.path.isdir('/proc')  # No procfs (macOS) - trust kill(0)
+    except OSError:
+        return True
+    return b'yt_mixer' in cmdline or b'yt-mixer' in cmdline
+
+def _read_pid(pid_file):
+    """Return (pid, alive) from a PID file - one read + one kill(0), no separate exists() stat"""
+    try:
+        fd = os.open(pid_file, os.O_RDONLY)
+        try:
+            pid = int(os.read(fd, 16).strip() or b'0') or None
+        finally:
+            os.close(fd)
+    except (FileNotFoundError, ValueError):
+        return None, False
+    if pid is None:
+        return None, False
+
+    try:
+        os.kill(pid, 0)
+    except PermissionError:
+        pass  # Alive, owned by another user
+    except OSError:
+        return pid, False
+    return pid, _is_our_pid(pid)
+
 def cmd_stop(args):
     """Stop the background server"""
     pid_file = DATA_DIR / "yt-mixer.pid"
+    pid, alive = _read_pid(pid_file)
     
-    if not pid_file.exists():
+    if pid is None:
         print("✗ YT Mixer is not running (no PID file found)")
         return 1
     
+    if not alive:
+        # Never signal a PID that has been recycled by an unrelated process
+        print("✓ Process already stopped")
+        pid_file.unlink(missing_ok=True)
+        return
+    
     try:
-        with open(pid_file, 'r') as f:
-            pid = int(f.read().strip())
-        
         # Try to kill the process
-        import os
-        import signal
-        import time
         
         print(f"Stopping YT Mixer (PID: {pid})...")
         
@@ -298,7 +384,7 @@ def cmd_stop(args):
                 raise
         
         # Remove PID file
-        pid_file.unlink()
+        pid_file.unlink(missing_ok=True)
         
     except Exception as e:
         print(f"✗ Error stopping YT Mixer: {e}")
@@ -308,23 +394,17 @@ def cmd_status_daemon(args):
     """Check if the background server is running"""
     pid_file = DATA_DIR / "yt-mixer.pid"
     
-    if not pid_file.exists():
-        print("Status: Not running")
-        return
-    
     try:
-        with open(pid_file, 'r') as f:
-            pid = int(f.read().strip())
-        
-        import os
-        try:
-            os.kill(pid, 0)  # Check if process exists
+        pid, alive = _read_pid(pid_file)
+        if pid is None:
+            print("Status: Not running")
+        elif alive:
             print(f"Status: Running (PID: {pid})")
             print(f"Config: http://{config.get('host')}:{config.get('port')}")
             print(f"Logs: {DATA_DIR}/yt-mixer.log")
-        except OSError:
+        else:
             print(f"Status: Stale PID file (process {pid} not found)")
-            pid_file.unlink()
+            pid_file.unlink(missing_ok=True)
     except Exception as e:
         print(f"✗ Error checking status: {e}")
 
@@ -352,28 +432,14 @@ def cmd_logs(args):
         return 1
     
     if args.follow:
-        # Robustly follow logs using tail -f subprocess
+        # Follow in-process: blocks on an inotify watch (1s polling where inotify is unavailable)
         print(f"=== Following logs from {log_file} (Ctrl+C to stop) ===")
         try:
-            # Popen allows us to read the output line by line
-            process = subprocess.Popen(
-                ['tail', '-f', '-n', '50', str(log_file)],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            # Read from stdout in a blocking manner, which is what we want
-            for line in iter(process.stdout.readline, ''):
-                sys.stdout.write(line)
-                sys.stdout.flush()
-
+            _follow_log(log_file)
         except KeyboardInterrupt:
             print("\nStopped following logs.")
         except Exception as e:
             print(f"\nError following logs: {e}")
-        finally:
-            if 'process' in locals() and process.poll() is None:
-                process.terminate() # Ensure tail process is killed
     else:
         # Show last N lines (this part was fine)
         lines = args.lines or 50
@@ -381,17 +447,15 @@ def cmd_logs(args):
 
 def cmd_serve(args):
     """Start the web server directly"""
-    import os
-    import signal
-    from .port_finder import get_available_port, release_port
     
     # Get preferred port from args or config
     preferred_port = args.port or config.get('port', 5052)
     host = args.host or config.get('host', '0.0.0.0')
     
-    # Find actually available port
+    # Claim an available port (bound socket, so nothing can take it before we serve)
     try:
-        port = get_available_port(preferred_port=preferred_port, start_range=5000)
+        sock = get_available_port(preferred_port=preferred_port, start_range=5000, host=host)
+        port = sock.getsockname()[1]
         if port != preferred_port:
             print(f"⚠️  Port {preferred_port} in use, using {port} instead")
             # Update config with working port
@@ -406,97 +470,60 @@ def cmd_serve(args):
         log_file = DATA_DIR / "yt-mixer.log"
         
         # Check if already running
-        if pid_file.exists():
-            try:
-                with open(pid_file, 'r') as f:
-                    old_pid = int(f.read().strip())
-                    # Check if process is still alive
-                    os.kill(old_pid, 0)
-                    print(f"✗ YT Mixer already running (PID: {old_pid})")
-                    print(f"  Stop it with: yt-mixer stop")
-                    return 1
-            except (OSError, ValueError):
-                # Process doesn't exist, remove stale pid file
-                pid_file.unlink()
-        
-        # Fork to background
-        try:
-            pid = os.fork()
-        except OSError as e:
-            print(f"✗ Fork failed: {e}")
+        old_pid, alive = _read_pid(pid_file)
+        if alive:
+            sock.close()
+            print(f"✗ YT Mixer already running (PID: {old_pid})")
+            print(f"  Stop it with: yt-mixer stop")
             return 1
-            
-        if pid > 0:
-            # Parent process - wait a moment to see if child survives
-            import time
-            time.sleep(1)
-            
-            # Check if child is still alive
-            try:
-                os.kill(pid, 0)
-                # Child is alive
-                with open(pid_file, 'w') as f:
-                    f.write(str(pid))
-                print(f"✓ YT Mixer started in background (PID: {pid})")
-                print(f"  Access at: http://{host}:{port}")
-                print(f"  Logs: {log_file}")
-                print(f"  Stop with: yt-mixer stop")
-                return 0
-            except OSError:
-                print(f"✗ Child process died immediately, check logs: {log_file}")
-                return 1
+        # Process doesn't exist, remove stale pid file
+        pid_file.unlink(missing_ok=True)
+        
+        # The child claims the port itself
+        sock.close()
         
-        # Child process continues here
-        # Create new session
-        os.setsid()
+        # Spawn a fresh foreground server (posix_spawn: no fork/CoW copy of this process)
+        cmd = [sys.executable, '-m', 'yt_mixer.cli', 'serve', '--host', host, '--port', str(port)]
+        if args.debug:
+            cmd.append('--debug')
+        env = dict(os.environ)
+        pkg_root = str(Path(__file__).resolve().parent.parent)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [pkg_root, env.get('PYTHONPATH')]))
         
-        # Second fork to prevent zombie
         try:
-            pid = os.fork()
+            pid = os.posix_spawn(sys.executable, cmd, env, file_actions=[
+                (os.POSIX_SPAWN_OPEN, 0, os.devnull, os.O_RDONLY, 0),
+                (os.POSIX_SPAWN_OPEN, 1, str(log_file), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644),
+                (os.POSIX_SPAWN_DUP2, 1, 2),
+            ], setsid=True)
         except OSError as e:
-            sys.exit(1)
-            
-        if pid > 0:
-            # First child exits
-            sys.exit(0)
-        
-        # Second child - this is the daemon
-        # Change working directory
-        os.chdir('/')
-        
-        # Redirect stdin to /dev/null
-        sys.stdin.close()
-        sys.stdin = open('/dev/null', 'r')
-        
-        # Redirect stdout/stderr to log file
-        log_fd = open(str(log_file), 'a')
-        sys.stdout = log_fd
-        sys.stderr = log_fd
-        
-        # Configure logging to use the log file
-        import logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[logging.StreamHandler(log_fd)]
-        )
+            print(f"✗ Spawn failed: {e}")
+            return 1
         
-        print(f"=== YT Mixer Daemon Starting ===")
-        print(f"PID: {os.getpid()}")
-        print(f"Host: {host}:{port}")
-        print(f"Data: {DATA_DIR}")
+        # Wait a moment to see if child survives
+        time.sleep(1)
         
-    else:
-        print(f"Starting YT Mixer on http://{host}:{port}")
-        print(f"Data directory: {DATA_DIR}")
-        print("Press Ctrl+C to stop")
+        if os.waitpid(pid, os.WNOHANG) != (0, 0):
+            print(f"✗ Child process died immediately, check logs: {log_file}")
+            return 1
         
-        # Configure logging for foreground
-        import logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
+        with open(pid_file, 'w') as f:
+            f.write(str(pid))
+        print(f"✓ YT Mixer started in background (PID: {pid})")
+        print(f"  Access at: http://{host}:{port}")
+        print(f"  Logs: {log_file}")
+        print(f"  Stop with: yt-mixer stop")
+        return 0
+    
+    print(f"Starting YT Mixer on http://{host}:{port}")
+    print(f"Data directory: {DATA_DIR}")
+    print("Press Ctrl+C to stop")
+    
+    # Configure logging (stderr - the log file when spawned by --daemon)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
     
     # Import here to avoid circular imports and ensure logging is configured
     # This import will create the manager instance
@@ -507,23 +534,17 @@ def cmd_serve(args):
     
     # Setup signal handlers
     def signal_handler(sig, frame):
-        if not args.daemon:
-            print("\nShutting down gracefully...")
-        else:
-            print("Received shutdown signal, stopping...")
+        print("\nShutting down gracefully...", flush=True)
         manager.shutdown()
-        release_port(port)  # Release the reserved port
-        import os
         os._exit(0)  # Force exit
     
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
     try:
-        app.run(host=host, port=port, debug=args.debug, use_reloader=False, threaded=True)
+        serve_app(app, sock, host, debug=args.debug)
     except Exception as e:
         print(f"Error starting server: {e}")
-        import traceback
         traceback.print_exc()
         sys.exit(1)
 
@@ -1,99 +1,123 @@
 """
 Port Finder - Concurrent-safe port allocation for Flask/Werkzeug apps
 
-Simplified version from omnipkg.utils.flask_port_finder
+Simplified version from omnipkg.utils.flask_port_finder.
+Ports are claimed with bind() itself: the kernel is the only arbiter, so there is
+no window between "port looks free" and the server binding it.
 """
 import socket
-import threading
 from contextlib import closing
-from typing import Set
+from typing import Optional
 
-# Global port reservation system (thread-safe)
-_port_lock = threading.Lock()
-_reserved_ports: Set[int] = set()
+# Worker threads for the production (waitress) server
+SERVER_THREADS = 32
 
 
-def is_port_free(port: int) -> bool:
+def _has_listener(port: int) -> bool:
     """
-    Check if a port is actually free.
+    Cheap probe: a loopback connect() completes (or is refused) immediately,
+    so a successful connect means a server already owns the port.
     """
-    try:
-        with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as sock:
-            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            sock.bind(("127.0.0.1", port))
-            return True
-    except OSError:
-        return False
+    with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as sock:
+        sock.settimeout(0.05)
+        return sock.connect_ex(("127.0.0.1", port)) == 0
 
 
-def reserve_port(port: int) -> bool:
+def bind_port(port: int, host: str = "0.0.0.0") -> Optional[socket.socket]:
     """
-    Reserve a port to prevent concurrent allocation race conditions.
-    Returns True if successfully reserved, False if already reserved.
+    Atomically claim a port: returns a bound, listening socket, or None if taken.
     """
-    with _port_lock:
-        if port in _reserved_ports:
-            return False
-        _reserved_ports.add(port)
-        return True
-
-
-def release_port(port: int):
-    """Release a reserved port."""
-    with _port_lock:
-        _reserved_ports.discard(port)
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.listen(128)
+        return sock
+    except OSError:
+        sock.close()
+        return None
 
 
-def find_free_port(start_port: int = 5000, max_attempts: int = 100, reserve: bool = True) -> int:
+def find_free_port(start_port: int = 5000, max_attempts: int = 100, host: str = "0.0.0.0") -> socket.socket:
     """
-    Find an available port with concurrent safety.
-    
+    Claim the first available port in a range.
+
     Args:
         start_port: Port to start searching from
         max_attempts: Maximum number of ports to try
-        reserve: Whether to reserve the port (prevents race conditions)
-    
+        host: Interface to bind
+
     Returns:
-        An available port number
-    
+        A bound, listening socket
+
     Raises:
         RuntimeError: If no free port found in range
     """
     for port in range(start_port, start_port + max_attempts):
-        # Check if already reserved
-        with _port_lock:
-            if port in _reserved_ports:
-                continue
-        
-        # Check if actually free
-        if not is_port_free(port):
+        # Skip ports with a live server without allocating a bind socket
+        if _has_listener(port):
             continue
-        
-        # Reserve if requested
-        if reserve:
-            if not reserve_port(port):
-                continue
-        
-        return port
-    
+
+        sock = bind_port(port, host)
+        if sock is not None:
+            return sock
+
     raise RuntimeError(
         f"Could not find free port in range {start_port}-{start_port + max_attempts}"
     )
 
 
-def get_available_port(preferred_port: int = None, start_range: int = 5000) -> int:
+def get_available_port(preferred_port: int = None, start_range: int = 5000,
+                       host: str = "0.0.0.0") -> socket.socket:
     """
-    Get an available port, preferring the specified port if free.
-    
+    Claim an available port, preferring the specified port if free.
+
     Args:
         preferred_port: Port to try first (if provided)
         start_range: Where to start searching if preferred port is taken
-    
+        host: Interface to bind
+
     Returns:
-        An available port number
+        A bound, listening socket - read the port with sock.getsockname()[1]
+    """
+    if preferred_port:
+        sock = bind_port(preferred_port, host)
+        if sock is not None:
+            return sock
+
+    return find_free_port(start_port=start_range, host=host)
+
+
+def serve_app(app, sock: socket.socket, host: str, debug: bool = False):
     """
-    if preferred_port and is_port_free(preferred_port):
-        if reserve_port(preferred_port):
-            return preferred_port
-    
-    return find_free_port(start_port=start_range, reserve=True)
\ No newline at end of file
+    Run a Flask app on an already-bound socket.
+    Uses waitress when installed (production server), else the threaded Werkzeug server;
+    debug always uses Werkzeug for the interactive debugger.
+    Blocks until the server stops; the socket is handed over to the server.
+    """
+    if not debug:
+        try:
+            from waitress import serve
+        except ImportError:
+            pass
+        else:
+            # SSE status streams and /stream waiters each hold a thread for a while
+            serve(app, sockets=[sock], threads=SERVER_THREADS, connection_limit=500,
+                  channel_timeout=120, asyncore_use_poll=True)
+            return
+
+    from werkzeug.serving import make_server
+
+    wsgi_app = app
+    app.debug = debug
+    if debug:
+        from werkzeug.debug import DebuggedApplication
+        wsgi_app = DebuggedApplication(app, evalex=True)
+
+    server = make_server(host, sock.getsockname()[1], wsgi_app, threaded=True, fd=sock.fileno())
+    sock.close()  # The server holds its own dup of the descriptor
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
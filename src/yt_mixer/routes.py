@@ -1,15 +1,116 @@
 import logging
-from pathlib import Path
+import os
 from flask import Flask, render_template, request, send_file, jsonify, redirect
 from .session_manager import manager
-from .config import config
+from .config import config, CHUNK_DIR, SCRATCH_DIR
+from .port_finder import get_available_port, serve_app
 import time
-from flask import Response
-import json
+from flask import Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.wsgi import FileWrapper
+try:
+    import orjson
+except ImportError:  # Optional speedup (pip install yt_mixer[fast])
+    orjson = None
 log = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+if orjson is not None:
+    class OrjsonProvider(DefaultJSONProvider):
+        """jsonify() via orjson - serializes straight to UTF-8 bytes in C"""
+        # Status dicts are keyed by int chunk index; stdlib json stringifies those too
+        options = orjson.OPT_NON_STR_KEYS
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+        def response(self, *args, **kwargs):
+            obj = self._prepare_response_obj(args, kwargs)
+            return self._app.response_class(
+                orjson.dumps(obj, default=self.default, option=self.options),
+                mimetype=self.mimetype
+            )
+
+    app.json = OrjsonProvider(app)
+
+# Fixed for the life of the process - resolved once instead of per request
+LOG_FILE = manager.log_file
+LOG_TAIL_BYTES = 64 * 1024
+
+# Internal nginx locations for X-Accel-Redirect (FINAL chunks / IMMEDIATE+QUICK scratch)
+ACCEL_ROOTS = (('/_chunks', os.path.join(CHUNK_DIR, '')), ('/_scratch', os.path.join(SCRATCH_DIR, '')))
+# Pushed status stream: re-check at least this often (fields outside mix_progress change too),
+# and send a keep-alive comment when nothing changed for this long
+STATUS_STREAM_POLL = 2
+STATUS_STREAM_HEARTBEAT = 30
+# Read size when the server has no sendfile()-backed wsgi.file_wrapper (werkzeug's default is 8 KB)
+SEND_BLOCK_SIZE = 64 * 1024
+# Log labels for the chunk tiers
+QUALITY_LABELS = {
+    'immediate': '⚡ IMMEDIATE',
+    'quick': '📊 QUICK',
+    'final': '✨ FINAL'
+}
+
+def _send_chunk(path):
+    """Send a chunk file, or let the reverse proxy send it when X-Accel-Redirect/X-Sendfile is enabled"""
+    # Chunk paths are plain strings built from CHUNK_DIR/SCRATCH_DIR - no Path() per request
+    if config.get('use_x_accel'):
+        for prefix, root in ACCEL_ROOTS:
+            if path.startswith(root):
+                if not os.path.isfile(path):
+                    raise FileNotFoundError(path)  # Keep the swapped-chunk retry in stream_current working
+                response = Response(mimetype='audio/mpeg')
+                response.headers['X-Accel-Redirect'] = prefix + path[len(root) - 1:]
+                return response
+    if config.get('use_x_sendfile'):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)  # Keep the swapped-chunk retry in stream_current working
+        response = Response(mimetype='audio/mpeg')
+        response.headers['X-Sendfile'] = os.path.realpath(path)
+        return response
+    # send_file sets Content-Length/Accept-Ranges and hands the open file to wsgi.file_wrapper,
+    # which servers like gunicorn turn into sendfile(2)
+    response = send_file(path, mimetype='audio/mpeg', conditional=True, etag=True)
+    if type(response.response) is FileWrapper:
+        # No server file_wrapper: Werkzeug would copy the file through Python in read() blocks
+        sock = request.environ.get('werkzeug.socket')
+        if sock is not None and response.status_code == 200:
+            response.response = _SocketSendfile(sock, response.response.file)
+        else:
+            response.response.buffer_size = SEND_BLOCK_SIZE
+    return response
+
+class _SocketSendfile:
+    """Response body that sendfile()s a whole file straight to the client socket"""
+    def __init__(self, sock, file):
+        self.sock = sock
+        self.file = file
+    
+    def __iter__(self):
+        yield b''  # Werkzeug writes and flushes the status line and headers on the first write
+        self.sock.sendfile(self.file)
+    
+    def close(self):
+        self.file.close()
+
+def _prefetch(*paths):
+    """Ask the kernel to start reading chunks into page cache (async readahead, best effort)"""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    for path in filter(None, paths):
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
 # ============================================================================
 # MAIN PAGE ROUTES
 # ============================================================================
@@ -28,24 +129,24 @@ def index():
     
     # Scenario 1: Create new session from playlist IDs
     if m_id and s_id:
-        log.info(f"Creating new session: music={m_id}, speech={s_id}")
+        log.info("Creating new session: music=%s, speech=%s", m_id, s_id)
         new_sid, worker = manager.get_or_create_session(m_id, s_id)
         if worker:
-            log.info(f"Session created: {new_sid}")
+            log.info("Session created: %s", new_sid)
             return redirect(f"/?sid={new_sid}")
         else:
             return "Error creating session", 500
     
     # Scenario 2: Load existing session from bookmark
     if sid:
-        log.info(f"Loading session from bookmark: {sid}")
+        log.info("Loading session from bookmark: %s", sid)
         loaded_sid, worker = manager.load_session_by_id(sid)
         
         if not worker:
-            log.error(f"Failed to load session {sid}")
+            log.error("Failed to load session %s", sid)
             return render_template('mixer.html', error=f"Session {sid} not found or expired")
         
-        log.info(f"Session {sid} loaded successfully")
+        log.info("Session %s loaded successfully", sid)
     
     # Scenario 2 & 3: Show page (with or without session ID)
     return render_template('mixer.html', sid=sid)
@@ -63,22 +164,7 @@ def status_global():
         return jsonify(error="No active session"), 404
     
     sid, worker = active
-    
-    with worker.lock:
-        # Get error log if available
-        errors = getattr(worker, 'error_log', [])
-        
-        return jsonify({
-            "session_id": sid,
-            "chunk_index": worker.chunk_index,
-            "current_chunk": str(worker.current_chunk_path) if worker.current_chunk_path else None,
-            "current_chunk_quality": worker.current_chunk_quality,
-            "preloaded_count": len(worker.preloaded_chunks),
-            "music_queue_size": len(worker.music_queue),
-            "speech_queue_size": len(worker.speech_queue),
-            "mix_progress": worker.mix_progress,
-            "errors": errors[-5:]  # Last 5 errors
-        })
+    return jsonify(session_id=sid, **worker.get_status())
 
 @app.route('/api/status/<sid>')
 def status_by_id(sid):
@@ -89,41 +175,67 @@ def status_by_id(sid):
         return jsonify(error="Session not active"), 404
     
     _, worker = active
+    return jsonify(session_id=sid, **worker.get_status())
+
+@app.route('/api/status/stream')
+def status_stream():
+    """Server-Sent Events: push the active session's status only when it changes"""
+    active = manager.get_active_session()
     
-    with worker.lock:
-        errors = getattr(worker, 'error_log', [])
-        
-        return jsonify({
-            "session_id": sid,
-            "chunk_index": worker.chunk_index,
-            "current_chunk": str(worker.current_chunk_path) if worker.current_chunk_path else None,
-            "current_chunk_quality": worker.current_chunk_quality,
-            "preloaded_count": len(worker.preloaded_chunks),
-            "music_queue_size": len(worker.music_queue),
-            "speech_queue_size": len(worker.speech_queue),
-            "mix_progress": worker.mix_progress,
-            "errors": errors[-5:]
-        })
+    if not active:
+        return jsonify(error="No active session"), 404
+    
+    sid, worker = active
+    
+    def generate():
+        # Reconnect quickly when the stream ends because the session changed
+        yield 'retry: 1000\n\n'
+        last = None
+        last_sent = time.monotonic()
+        while manager.get_active_session() is active:
+            payload = app.json.dumps(dict(session_id=sid, **worker.get_status()))
+            if payload != last:
+                last = payload
+                last_sent = time.monotonic()
+                yield f'data: {payload}\n\n'
+            elif time.monotonic() - last_sent >= STATUS_STREAM_HEARTBEAT:
+                last_sent = time.monotonic()
+                yield ': keep-alive\n\n'
+            
+            with worker.progress_changed:
+                worker.progress_changed.wait(timeout=STATUS_STREAM_POLL)
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Don't let nginx hold events back
+    return response
 
 @app.route('/api/sessions')
 def list_sessions():
     """List all sessions on disk"""
-    sessions = manager.list_sessions()
-    return jsonify(sessions=sessions)
+    def generate():
+        # First byte goes out before the directory walk - one session per write
+        yield '{"sessions": ['
+        for i, session in enumerate(manager.iter_sessions()):
+            yield (',' if i else '') + app.json.dumps(session)
+        yield ']}'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
 
 @app.route('/api/logs')
 def get_recent_logs():
     """Get recent log entries for debugging"""
     try:
-        log_file = manager.log_file
-        if not log_file.exists():
+        # Read last 100 lines - only the final 64KB block, not the whole (possibly huge) file
+        try:
+            with open(LOG_FILE, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - LOG_TAIL_BYTES))
+                tail = f.read().decode('utf-8', 'replace')
+        except FileNotFoundError:
             return jsonify(logs=[])
         
-        # Read last 100 lines
-        with open(log_file, 'r') as f:
-            lines = f.readlines()
-            recent = lines[-100:]
-        
+        recent = tail.splitlines(keepends=True)[-100:]
         return jsonify(logs=recent)
     except Exception as e:
         return jsonify(error=str(e)), 500
@@ -144,30 +256,35 @@ def stream_current():
         log.error("Stream request with no active session")
         return jsonify(error="No active session"), 404
     
-    sid, worker = active
-    
+    return _stream_chunk(*active)
+
+def _stream_chunk(sid, worker):
+    """Serve the worker's current chunk, promoting/waiting as needed (session already resolved)"""
     # WAIT for up to 60 seconds for a chunk to be ready
     max_wait = 60
-    wait_interval = 0.5
-    waited = 0
-    
-    log.info(f"[{sid}] Stream request - waiting for chunk...")
-    
-    while waited < max_wait:
-        with worker.lock:
-            # Check if current chunk exists
-            if worker.current_chunk_path and Path(worker.current_chunk_path).exists():
-                chunk_path = Path(worker.current_chunk_path)
-                
-                quality_map = {
-                    'immediate': '⚡ IMMEDIATE',
-                    'quick': '📊 QUICK', 
-                    'final': '✨ FINAL'
-                }
-                quality = quality_map.get(worker.current_chunk_quality, 'UNKNOWN')
-                log.info(f"[{sid}] Streaming {quality} quality: {chunk_path.name}")
-                
-                return send_file(worker.current_chunk_path, mimetype='audio/mpeg')
+    deadline = time.monotonic() + max_wait
+    
+    log.info("[%s] Stream request - waiting for chunk...", sid)
+    
+    while True:
+        # Attribute reads are atomic - send_file() runs without worker.lock. Only finished files
+        # are ever published as current, so there is no exists() pre-check: opening it is the check
+        current = worker.current_chunk_path
+        if current:
+            quality = worker.current_chunk_quality
+            try:
+                response = _send_chunk(current)
+            except FileNotFoundError:
+                response = None  # Swapped out by an upgrade (or deleted) after we read it
+            if response is not None:
+                log.info("[%s] Streaming %s quality: %s", sid, QUALITY_LABELS.get(quality, 'UNKNOWN'), os.path.basename(current))
+                return response
+        
+        # chunk_ready shares worker.lock; wait() releases it so the producer can publish
+        chunk_info = None
+        with worker.chunk_ready:
+            if worker.current_chunk_path != current:
+                continue  # Swapped while we were checking - look again
             
             # Try to promote a preloaded chunk
             if worker.preloaded_chunks:
@@ -175,24 +292,28 @@ def stream_current():
                 worker.current_chunk_path = chunk_info['path']
                 worker.current_chunk_quality = chunk_info.get('quality', 'none')
                 worker.chunk_index += 1
-                log.info(f"[{sid}] Promoted chunk {worker.chunk_index} to current (quality={worker.current_chunk_quality})")
-                
-                if Path(worker.current_chunk_path).exists():
-                    return send_file(worker.current_chunk_path, mimetype='audio/mpeg')
+                promoted_index = worker.chunk_index
+                worker.notify_consumed()
+                worker.chunk_ready.notify_all()  # Other waiting streams can serve it too
+            else:
+                # Sleep until the worker publishes a chunk (wake every 5s only to log)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                woken = worker.chunk_ready.wait(timeout=min(5, remaining))
         
-        # Wait a bit and try again
-        time.sleep(wait_interval)
-        waited += wait_interval
-        
-        if waited % 5 == 0:  # Log every 5 seconds
-            log.info(f"[{sid}] Still waiting for chunk... ({waited}s)")
+        if chunk_info:
+            # Served from the top of the loop as the new current chunk
+            log.info("[%s] Promoted chunk %s to current (quality=%s)", sid, promoted_index, chunk_info.get('quality', 'none'))
+        elif not woken:
+            log.info("[%s] Still waiting for chunk... (%.0fs)", sid, max_wait - max(0, deadline - time.monotonic()))
     
     # Timeout after max_wait
-    log.error(f"[{sid}] Stream timeout after {max_wait}s - no chunk ready")
+    log.error("[%s] Stream timeout after %ss - no chunk ready", sid, max_wait)
     return jsonify(
         error="Audio not ready yet",
         hint="First chunk is still being prepared. This can take 10-30 seconds.",
-        waited=waited
+        waited=max_wait
     ), 503
 
 @app.route('/stream/<sid>')
@@ -201,10 +322,10 @@ def stream_by_session(sid):
     active = manager.get_active_session()
     
     if not active or active[0] != sid:
-        log.warning(f"Stream request for inactive session {sid}")
+        log.warning("Stream request for inactive session %s", sid)
         return jsonify(error="Session not active"), 404
     
-    return stream_current()
+    return _stream_chunk(*active)
 
 # ============================================================================
 # PLAYBACK CONTROL ROUTES
@@ -220,36 +341,40 @@ def next_chunk():
     
     sid, worker = active
     
+    chunk_index = None
     with worker.lock:
-        # Clean up old current chunk
-        if worker.current_chunk_path and Path(worker.current_chunk_path).exists():
-            try:
-                Path(worker.current_chunk_path).unlink()
-                log.info(f"[{sid}] Cleaned up old chunk")
-            except Exception as e:
-                log.warning(f"[{sid}] Failed to clean up: {e}")
-        
-        # Promote next chunk
+        # Promote next chunk; the old one is unlinked by the background loop, not here
         if worker.preloaded_chunks:
+            if worker.current_chunk_path:
+                worker.discard_chunk(worker.current_chunk_path)
             chunk_info = worker.preloaded_chunks.pop(0)
             worker.current_chunk_path = chunk_info['path']
-            worker.current_chunk_quality = chunk_info.get('quality', 'none')
-            worker.chunk_index += 1
-            
-            log.info(f"[{sid}] Advanced to chunk {worker.chunk_index} (quality={worker.current_chunk_quality})")
-            
-            return jsonify(
-                success=True,
-                chunk_index=worker.chunk_index,
-                quality=worker.current_chunk_quality,
-                session_id=sid
-            )
-        else:
-            log.warning(f"[{sid}] No preloaded chunks available")
-            return jsonify(
-                success=False,
-                error="No preloaded chunks available"
-            ), 503
+            worker.current_chunk_quality = quality = chunk_info.get('quality', 'none')
+            worker.chunk_index = chunk_index = worker.chunk_index + 1
+            worker.notify_consumed()
+            worker.chunk_ready.notify_all()  # Wake streams waiting for a current chunk
+            upcoming = worker.preloaded_chunks[0]['path'] if worker.preloaded_chunks else None
+    
+    # Logging and JSON encoding happen after the lock is released
+    if chunk_index is None:
+        log.warning("[%s] No preloaded chunks available", sid)
+        return jsonify(
+            success=False,
+            error="No preloaded chunks available"
+        ), 503
+    
+    # The player fetches the new current chunk next, and the one after it later:
+    # start both disk reads now so they overlap playback
+    _prefetch(chunk_info['path'], upcoming)
+    
+    log.info("[%s] Advanced to chunk %s (quality=%s)", sid, chunk_index, quality)
+    
+    return jsonify(
+        success=True,
+        chunk_index=chunk_index,
+        quality=quality,
+        session_id=sid
+    )
 
 # ============================================================================
 # SESSION MANAGEMENT ROUTES
@@ -259,11 +384,14 @@ def next_chunk():
 def delete_session(sid):
     """Delete a session and all its data"""
     try:
-        log.info(f"Deleting session {sid}")
+        log.info("Deleting session %s", sid)
         manager.delete_session(sid)
         return jsonify(success=True, message=f"Deleted session {sid}")
+    except ValueError as e:
+        log.warning("Rejected delete for %s: %s", sid, e)
+        return jsonify(success=False, error=str(e)), 400
     except Exception as e:
-        log.error(f"Error deleting session {sid}: {e}")
+        log.error("Error deleting session %s: %s", sid, e)
         return jsonify(success=False, error=str(e)), 500
 
 # Add these new routes to routes.py (around line 150, before the session management section)
@@ -287,7 +415,7 @@ def update_position():
         manager.update_playback_position(sid, chunk_idx, position)
         return jsonify(success=True)
     except Exception as e:
-        log.error(f"Error updating playback position: {e}")
+        log.error("Error updating playback position: %s", e)
         return jsonify(error=str(e)), 500
 
 @app.route('/api/playback/position/<sid>')
@@ -297,7 +425,7 @@ def get_position(sid):
         position = manager.get_playback_position(sid)
         return jsonify(position)
     except Exception as e:
-        log.error(f"Error getting playback position: {e}")
+        log.error("Error getting playback position: %s", e)
         return jsonify(error=str(e)), 500
 
 @app.route('/api/session/active')
@@ -310,14 +438,14 @@ def get_active_session():
     
     sid, worker = active
     
-    with worker.lock:
-        return jsonify(
-            active=True,
-            session_id=sid,
-            chunk_index=worker.chunk_index,
-            current_chunk_quality=worker.current_chunk_quality,
-            ready_chunks=len(worker.preloaded_chunks)
-        )
+    # Lock-free like worker.get_status(): each field is a single atomic read
+    return jsonify(
+        active=True,
+        session_id=sid,
+        chunk_index=worker.chunk_index,
+        current_chunk_quality=worker.current_chunk_quality,
+        ready_chunks=len(worker.preloaded_chunks)
+    )
 
 # ============================================================================
 # STARTUP/SHUTDOWN
@@ -325,36 +453,35 @@ def get_active_session():
 
 def start_server(host=None, port=None, debug=False):
     """Start the Flask server"""
-    from .port_finder import get_available_port, release_port
     
     host = host or config.get('host', '0.0.0.0')
     preferred_port = port or config.get('port', 5052)
     
-    # Find available port
+    # Claim a port - the bound socket is handed straight to the server, so it can't be lost
     try:
-        actual_port = get_available_port(preferred_port=preferred_port, start_range=5000)
+        sock = get_available_port(preferred_port=preferred_port, start_range=5000, host=host)
+        actual_port = sock.getsockname()[1]
         if actual_port != preferred_port:
-            log.warning(f"Port {preferred_port} in use, using {actual_port} instead")
+            log.warning("Port %s in use, using %s instead", preferred_port, actual_port)
             config.set('port', actual_port)
     except RuntimeError as e:
-        log.error(f"Could not find available port: {e}")
+        log.error("Could not find available port: %s", e)
         return
     
-    log.info(f"=== YT MIXER SERVER STARTING ===")
-    log.info(f"URL: http://{host}:{actual_port}")
-    log.info(f"Local: http://localhost:{actual_port}")
-    log.info(f"Log file: {manager.log_file}")
-    log.info(f"Three-tier streaming: IMMEDIATE → QUICK → FINAL")
+    log.info("=== YT MIXER SERVER STARTING ===")
+    log.info("URL: http://%s:%s", host, actual_port)
+    log.info("Local: http://localhost:%s", actual_port)
+    log.info("Log file: %s", LOG_FILE)
+    log.info("Three-tier streaming: IMMEDIATE → QUICK → FINAL")
     
     # Ensure manager's cleanup thread is running
     manager.start_maintenance()
     
     try:
-        app.run(host=host, port=actual_port, debug=debug, use_reloader=False, threaded=True)
+        serve_app(app, sock, host, debug=debug)
     finally:
         log.info("Shutting down YT Mixer...")
         manager.shutdown()
-        release_port(actual_port)
 
 if __name__ == '__main__':
     start_server()
\ No newline at end of file
@@ -1,18 +1,29 @@
 import hashlib
+import os
 import time
 import shutil
 import logging
+import logging.handlers
+import queue
+import re
 import threading
 import sys
 import json
 from pathlib import Path
-from .audio_engine import AudioWorker
-from .config import CHUNK_DIR, AUDIO_DIR, DATA_DIR, config
+from .audio_engine import AudioWorker, shutdown_pools, trim_shared_audio
+from .config import CHUNK_DIR, AUDIO_DIR, DATA_DIR, MAX_AUDIO_CACHE_MB, config
 
 log = logging.getLogger(__name__)
 
+# Metadata/playback JSON is written by the maintenance thread at most this often
+STATE_FLUSH_INTERVAL = 5
+PRUNE_INTERVAL = 3600
+# Session IDs are 12 hex chars (blake2b digest_size=6, or truncated md5 for legacy sessions);
+# anything else arriving from a URL must never be joined onto a data directory
+SESSION_ID_RE = re.compile(r'[0-9a-f]{12}')
+
 def setup_logging():
-    """Setup file logging - MUST be called before any logging"""
+    """Setup file logging - MUST be called before any logging. Returns (log_file, listener)"""
     log_file = DATA_DIR / "yt-mixer.log"
     
     # Ensure data dir exists
@@ -37,13 +48,51 @@ def setup_logging():
     )
     file_handler.setFormatter(file_formatter)
     
-    # Add both handlers
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
+    # Request threads only enqueue records; one listener thread does the console/disk writes
+    log_queue = queue.SimpleQueue()
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
     root_logger.setLevel(logging.INFO)
+    listener = logging.handlers.QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
+    )
+    listener.start()
     
-    log.info(f"=== YT-MIXER LOGGING STARTED === Log file: {log_file}")
-    return log_file
+    log.info("=== YT-MIXER LOGGING STARTED === Log file: %s", log_file)
+    return log_file, listener
+
+class SessionMeta:
+    """Persisted playlist pair for one session ID (slots: no per-record dict)"""
+    __slots__ = ('music_pid', 'speech_pid', 'created')
+    
+    def __init__(self, music_pid=None, speech_pid=None, created=None):
+        self.music_pid = music_pid
+        self.speech_pid = speech_pid
+        self.created = created
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('music_pid'), data.get('speech_pid'), data.get('created'))
+    
+    def to_dict(self):
+        return {'music_pid': self.music_pid, 'speech_pid': self.speech_pid, 'created': self.created}
+
+def _fast_rmtree(path):
+    """Remove a flat session directory with one scandir pass + unlink per file; False if it was missing"""
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                # Session dirs only hold files - anything else takes the slow, careful path
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    try:
+                        os.unlink(entry.path)
+                    except FileNotFoundError:
+                        pass
+        os.rmdir(path)
+    except FileNotFoundError:
+        return False
+    return True
 
 class SessionManager:
     """
@@ -52,23 +101,28 @@ class SessionManager:
     """
     def __init__(self):
         # Setup logging FIRST THING
-        self.log_file = setup_logging()
+        self.log_file, self._log_listener = setup_logging()
         
         self.active_session = None  # (session_id, AudioWorker)
+        self._active_key = None  # (music_id, speech_id) of active_session, stripped
         self.lock = threading.Lock()
+        # Serializes session switches/deletes; held across worker start/stop, unlike self.lock
+        self._switch_lock = threading.Lock()
         
         # Session metadata persistence
         self.config_file = DATA_DIR / "sessions.json"
-        self.session_metadata = {}  # {sid: {music_pid, speech_pid}}
+        self.session_metadata = {}  # {sid: SessionMeta}
+        self._meta_dirty = False
         self._load_session_metadata()
     
         # NEW: Playback state tracking
         self.playback_state_file = DATA_DIR / "playback_state.json"
         self.playback_state = {}  # {sid: {chunk_index, position_seconds, last_updated}}
+        self._playback_dirty = False
         self._load_playback_state()
         
         # Background maintenance thread (started on demand)
-        self.running = False
+        self._stop = threading.Event()  # Set by shutdown() - wakes the maintenance loop at once
         self.cleaner_thread = None
         self._thread_started = False  # Track if thread has been started
         
@@ -79,19 +133,17 @@ class SessionManager:
         if self.config_file.exists():
             try:
                 with open(self.config_file, 'r') as f:
-                    self.session_metadata = json.load(f)
-                log.info(f"Loaded metadata for {len(self.session_metadata)} sessions")
+                    self.session_metadata = {
+                        sid: SessionMeta.from_dict(data) for sid, data in json.load(f).items()
+                    }
+                log.info("Loaded metadata for %s sessions", len(self.session_metadata))
             except Exception as e:
-                log.error(f"Error loading session metadata: {e}")
+                log.error("Error loading session metadata: %s", e)
                 self.session_metadata = {}
     
     def _save_session_metadata(self):
-        """Save session metadata to disk"""
-        try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.session_metadata, f, indent=2)
-        except Exception as e:
-            log.error(f"Error saving session metadata: {e}")
+        """Mark session metadata for the next background flush (caller holds self.lock)"""
+        self._meta_dirty = True
 
     def _load_playback_state(self):
         """Load playback positions from disk"""
@@ -99,18 +151,35 @@ class SessionManager:
             try:
                 with open(self.playback_state_file, 'r') as f:
                     self.playback_state = json.load(f)
-                log.info(f"Loaded playback state for {len(self.playback_state)} sessions")
+                log.info("Loaded playback state for %s sessions", len(self.playback_state))
             except Exception as e:
-                log.error(f"Error loading playback state: {e}")
+                log.error("Error loading playback state: %s", e)
                 self.playback_state = {}
 
     def _save_playback_state(self):
-        """Save playback positions to disk"""
-        try:
-            with open(self.playback_state_file, 'w') as f:
-                json.dump(self.playback_state, f, indent=2)
-        except Exception as e:
-            log.error(f"Error saving playback state: {e}")
+        """Mark playback positions for the next background flush (caller holds self.lock)"""
+        self._playback_dirty = True
+
+    def _flush_state(self):
+        """Write dirty metadata/playback JSON - serialized under the lock, written outside it"""
+        with self.lock:
+            pending = []
+            if self._meta_dirty:
+                metadata = {sid: meta.to_dict() for sid, meta in self.session_metadata.items()}
+                pending.append((self.config_file, json.dumps(metadata, separators=(',', ':'))))
+                self._meta_dirty = False
+            if self._playback_dirty:
+                pending.append((self.playback_state_file, json.dumps(self.playback_state, separators=(',', ':'))))
+                self._playback_dirty = False
+        
+        for path, data in pending:
+            # Write-then-rename so a crash never leaves half-written JSON behind
+            tmp = path.with_suffix('.json.tmp')
+            try:
+                tmp.write_text(data)
+                os.replace(tmp, path)
+            except Exception as e:
+                log.error("Error saving %s: %s", path.name, e)
 
     def update_playback_position(self, session_id, chunk_index, position_seconds):
         """Update and persist playback position - called every 5s from client"""
@@ -121,7 +190,7 @@ class SessionManager:
                 'last_updated': time.time()
             }
             self._save_playback_state()
-            log.debug(f"[{session_id}] Saved position: chunk {chunk_index}, {position_seconds:.1f}s")
+            log.debug("[%s] Saved position: chunk %s, %.1fs", session_id, chunk_index, position_seconds)
 
     def get_playback_position(self, session_id):
         """Get saved playback position for session - used for resume after crash"""
@@ -140,7 +209,7 @@ class SessionManager:
                 return
             
             # Start new thread
-            self.running = True
+            self._stop.clear()
             self.cleaner_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
             self.cleaner_thread.start()
             self._thread_started = True
@@ -148,84 +217,94 @@ class SessionManager:
     
     def get_session_id(self, music_id, speech_id):
         """Generate a consistent hash for a playlist combo"""
-        raw = f"{music_id.strip()}|{speech_id.strip()}"
-        return hashlib.md5(raw.encode()).hexdigest()[:12]  # Short 12-char hash
+        raw = f"{music_id.strip()}|{speech_id.strip()}".encode()
+        sid = hashlib.blake2b(raw, digest_size=6).hexdigest()  # Short 12-char hash
+        if sid not in self.session_metadata:
+            # Sessions created before the switch from md5 keep their ID (and their chunks)
+            legacy_sid = hashlib.md5(raw).hexdigest()[:12]
+            if legacy_sid in self.session_metadata:
+                return legacy_sid
+        return sid
     
     def get_or_create_session(self, music_id, speech_id):
         """
         Get or create a session.
         If a different session is requested, clean up the old one.
         """
+        key = (music_id.strip(), speech_id.strip())
         with self.lock:
-            sid = self.get_session_id(music_id, speech_id)
-            
-            # Store metadata
-            self.session_metadata[sid] = {
-                'music_pid': music_id,
-                'speech_pid': speech_id,
-                'created': time.time()
-            }
-            self._save_session_metadata()
-            
-            # If we already have this session, return it
-            if self.active_session and self.active_session[0] == sid:
-                log.info(f"[{sid}] Reusing existing session")
-                return sid, self.active_session[1]
-            
-            # Different session requested - clean up old one
-            if self.active_session:
-                old_sid, old_worker = self.active_session
-                log.info(f"Switching from session {old_sid} to {sid}")
-                self._cleanup_session(old_sid, old_worker)
-            
-            # Create new session
-            log.info(f"[{sid}] Starting new session: music={music_id}, speech={speech_id}")
-            worker = AudioWorker(sid, music_id, speech_id)
-            self.active_session = (sid, worker)
+            # Common case (page reload): same playlists, no hashing or metadata write
+            if self.active_session and self._active_key == key:
+                log.info("[%s] Reusing existing session", self.active_session[0])
+                return self.active_session
+        
+        with self._switch_lock:
+            with self.lock:
+                sid = self.get_session_id(music_id, speech_id)
+                
+                # Store metadata
+                self.session_metadata[sid] = SessionMeta(music_id, speech_id, time.time())
+                self._save_session_metadata()
+                
+                # If we already have this session (possibly just switched in by another request), return it
+                if self.active_session and self.active_session[0] == sid:
+                    log.info("[%s] Reusing existing session", sid)
+                    self._active_key = key
+                    return sid, self.active_session[1]
             
-            return sid, worker
+            log.info("[%s] Starting new session: music=%s, speech=%s", sid, music_id, speech_id)
+            return self._switch_to(sid, music_id, speech_id)
     
     def load_session_by_id(self, sid):
         """
         Load a session by ID from bookmark.
         This restores the session from metadata if it exists.
         """
-        with self.lock:
-            # If already active, return it
-            if self.active_session and self.active_session[0] == sid:
-                log.info(f"[{sid}] Session already active")
-                return sid, self.active_session[1]
+        with self._switch_lock:
+            with self.lock:
+                # If already active, return it
+                if self.active_session and self.active_session[0] == sid:
+                    log.info("[%s] Session already active", sid)
+                    return sid, self.active_session[1]
+                
+                # Try to get metadata
+                metadata = self.session_metadata.get(sid)
             
-            # Try to get metadata
-            if sid not in self.session_metadata:
-                log.error(f"[{sid}] No metadata found for this session!")
+            if metadata is None:
+                log.error("[%s] No metadata found for this session!", sid)
                 return None, None
             
-            metadata = self.session_metadata[sid]
-            music_id = metadata.get('music_pid')
-            speech_id = metadata.get('speech_pid')
+            music_id = metadata.music_pid
+            speech_id = metadata.speech_pid
             
             if not music_id or not speech_id:
-                log.error(f"[{sid}] Invalid metadata: {metadata}")
+                log.error("[%s] Invalid metadata: %s", sid, metadata.to_dict())
                 return None, None
             
-            # Clean up old active session if exists
-            if self.active_session:
-                old_sid, old_worker = self.active_session
-                log.info(f"Cleaning up old session {old_sid}")
-                self._cleanup_session(old_sid, old_worker)
-            
-            # Create worker for this session
-            log.info(f"[{sid}] Restoring session from bookmark: music={music_id}, speech={speech_id}")
-            worker = AudioWorker(sid, music_id, speech_id)
+            log.info("[%s] Restoring session from bookmark: music=%s, speech=%s", sid, music_id, speech_id)
+            return self._switch_to(sid, music_id, speech_id)
+    
+    def _switch_to(self, sid, music_id, speech_id):
+        """
+        Build a worker and make it the active session (caller holds _switch_lock, not self.lock).
+        The old worker keeps serving until the swap, then is stopped off-lock.
+        """
+        worker = AudioWorker(sid, music_id, speech_id)
+        
+        with self.lock:
+            old = self.active_session
             self.active_session = (sid, worker)
-            
-            return sid, worker
+            self._active_key = (music_id.strip(), speech_id.strip())
+        
+        if old:
+            log.info("Switching from session %s to %s", old[0], sid)
+            self._cleanup_session(*old)
+        
+        return sid, worker
     
     def get_active_session(self):
-        """Get the currently active session"""
-        with self.lock:
-            return self.active_session
+        """Get the currently active session (lock-free: the tuple is only ever replaced, never mutated)"""
+        return self.active_session
     
     def _cleanup_session(self, session_id, worker):
         """
@@ -233,91 +312,116 @@ class SessionManager:
         By default, keeps the chunks so user can return to them.
         """
         try:
-            # Stop the worker thread
-            worker.running = False
-            if hasattr(worker, 'thread'):
-                worker.thread.join(timeout=5)
+            # Stop the worker thread (also clears its tmpfs scratch)
+            worker.stop()
             
-            log.info(f"[{session_id}] Stopped worker")
+            log.info("[%s] Stopped worker", session_id)
             
-            # Keep chunks but clean up raw audio to save space
-            audio_dir = AUDIO_DIR / session_id
-            if audio_dir.exists():
-                shutil.rmtree(audio_dir)
-                log.info(f"[{session_id}] Cleaned up raw audio")
+            # Keep chunks but drop the session's track links. The same files stay in the
+            # shared download cache (until its hourly LRU trim), so a resumed session
+            # re-links them instead of downloading again
+            if _fast_rmtree(AUDIO_DIR / session_id):
+                log.info("[%s] Cleaned up raw audio", session_id)
             
         except Exception as e:
-            log.error(f"[{session_id}] Error cleaning up: {e}")
+            log.error("[%s] Error cleaning up: %s", session_id, e)
     
     def delete_session(self, session_id):
         """
         Completely delete a session's data.
         Useful for freeing up disk space.
         """
-        with self.lock:
-            # Stop worker if it's the active one
-            if self.active_session and self.active_session[0] == session_id:
-                _, worker = self.active_session
-                worker.running = False
-                self.active_session = None
+        if not SESSION_ID_RE.fullmatch(session_id):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+
+        with self._switch_lock:
+            worker = None
+            with self.lock:
+                # Detach worker if it's the active one
+                if self.active_session and self.active_session[0] == session_id:
+                    _, worker = self.active_session
+                    self.active_session = None
+                    self._active_key = None
+                
+                # Delete metadata
+                if self.session_metadata.pop(session_id, None) is not None:
+                    self._save_session_metadata()
             
-            # Delete metadata
-            if session_id in self.session_metadata:
-                del self.session_metadata[session_id]
-                self._save_session_metadata()
+            # Joining the worker and deleting files happen off self.lock
+            if worker:
+                worker.stop()
             
             # Delete all data
             chunk_dir = CHUNK_DIR / session_id
             audio_dir = AUDIO_DIR / session_id
             
             for directory in [chunk_dir, audio_dir]:
-                if directory.exists():
-                    shutil.rmtree(directory)
-                    log.info(f"[{session_id}] Deleted {directory}")
+                if _fast_rmtree(directory):
+                    log.info("[%s] Deleted %s", session_id, directory)
     
     def list_sessions(self):
         """
         List all sessions on disk (active or cached).
         Returns list of (session_id, chunk_count, size_mb, is_active)
         """
-        sessions = []
+        return list(self.iter_sessions())
+    
+    def iter_sessions(self):
+        """Yield session summaries one directory at a time (for streamed responses), active first"""
+        with self.lock:
+            active_sid = self.active_session[0] if self.active_session else None
         
-        session_dirs = list(CHUNK_DIR.glob('*'))
-        for session_dir in session_dirs:
-            if session_dir.is_dir():
-                chunks = list(session_dir.glob('*.mp3'))
-                size_mb = sum(f.stat().st_size for f in chunks) / (1024 * 1024)
-                
-                is_active = False
-                with self.lock:
-                    if self.active_session and self.active_session[0] == session_dir.name:
-                        is_active = True
-                
-                metadata = self.session_metadata.get(session_dir.name, {})
-                
-                sessions.append({
-                    'id': session_dir.name,
-                    'chunks': len(chunks),
-                    'size_mb': size_mb,
-                    'is_active': is_active,
-                    'music_pid': metadata.get('music_pid'),
-                    'speech_pid': metadata.get('speech_pid')
-                })
+        # The active session needs no directory listing to be found - send it before the scan
+        if active_sid is not None:
+            yield self._session_summary(active_sid, CHUNK_DIR / active_sid, True)
         
-        return sessions
+        # DirEntry.is_dir() answers from the dirent type - no stat per session
+        with os.scandir(CHUNK_DIR) as it:
+            session_dirs = [(e.name, e.path) for e in it
+                            if e.name != active_sid and e.is_dir(follow_symlinks=False)]
+        
+        for name, path in session_dirs:
+            yield self._session_summary(name, path, False)
+    
+    def _session_summary(self, name, path, is_active):
+        """Chunk count/size for one session dir from a single scandir pass"""
+        count = 0
+        total = 0
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.name.endswith('.mp3') and entry.is_file(follow_symlinks=False):
+                        count += 1
+                        total += entry.stat(follow_symlinks=False).st_size
+        except FileNotFoundError:
+            pass  # Active session that hasn't written a chunk dir yet, or deleted mid-scan
+        
+        metadata = self.session_metadata.get(name) or SessionMeta()
+        
+        return {
+            'id': name,
+            'chunks': count,
+            'size_mb': total / (1024 * 1024),
+            'is_active': is_active,
+            'music_pid': metadata.music_pid,
+            'speech_pid': metadata.speech_pid
+        }
     
     def _cleanup_loop(self):
         """
-        Background thread that periodically cleans up old sessions.
-        Runs every hour.
+        Background thread that flushes dirty session state every few seconds
+        and prunes old sessions (and orphaned shared downloads) every hour.
         """
-        while self.running:
+        last_prune = time.monotonic()
+        while not self._stop.wait(STATE_FLUSH_INTERVAL):
             try:
-                time.sleep(3600)  # 1 hour
-                if self.running:  # Check again after sleep
+                self._flush_state()
+                if time.monotonic() - last_prune >= PRUNE_INTERVAL:
+                    last_prune = time.monotonic()
                     self._prune_old_sessions()
+                    trim_shared_audio(int(config.get('max_audio_cache_mb', MAX_AUDIO_CACHE_MB)) * 1024 * 1024)
             except Exception as e:
-                log.error(f"Error in cleanup loop: {e}")
+                log.error("Error in cleanup loop: %s", e)
     
     def _prune_old_sessions(self):
         """
@@ -328,37 +432,50 @@ class SessionManager:
         
         log.info("Running session cleanup...")
         
-        session_dirs = list(CHUNK_DIR.glob('*'))
-        for session_dir in session_dirs:
-            if not session_dir.is_dir():
-                continue
-            
-            # Skip active session
-            with self.lock:
-                if self.active_session and self.active_session[0] == session_dir.name:
+        # Snapshot the active session once instead of taking the lock per directory
+        with self.lock:
+            active_sid = self.active_session[0] if self.active_session else None
+        
+        stale = []
+        with os.scandir(CHUNK_DIR) as it:
+            for entry in it:
+                # Skip non-directories and the active session
+                if entry.name == active_sid or not entry.is_dir(follow_symlinks=False):
                     continue
-            
-            # Check age based on last modification time
-            age = now - session_dir.stat().st_mtime
-            
-            if age > max_age_seconds:
-                log.info(f"Pruning old session: {session_dir.name} (age: {age/86400:.1f} days)")
-                self.delete_session(session_dir.name)
+                
+                # Check age based on last modification time
+                age = now - entry.stat(follow_symlinks=False).st_mtime
+                if age > max_age_seconds:
+                    stale.append((entry.name, age))
+        
+        for sid, age in stale:
+            log.info("Pruning old session: %s (age: %.1f days)", sid, age/86400)
+            self.delete_session(sid)
     
     def shutdown(self):
         """Gracefully shutdown all workers"""
         log.info("Shutting down SessionManager...")
-        self.running = False
+        self._stop.set()
         
         with self.lock:
-            if self.active_session:
-                _, worker = self.active_session
-                worker.running = False
-                log.info("Stopped active worker")
+            active, self.active_session = self.active_session, None
+            self._active_key = None
+        
+        # Full stop (not just running=False): pooled mixes and downloads bail out and the
+        # upgrade/collector pools drop queued work, so interpreter exit doesn't wait on them
+        if active:
+            active[1].stop()
+            log.info("Stopped active worker")
+        shutdown_pools()
         
         if self.cleaner_thread and self.cleaner_thread.is_alive():
             self.cleaner_thread.join(timeout=5)
             log.info("Stopped maintenance thread")
+        
+        self._flush_state()
+        
+        # Drain queued log records to disk before the process exits
+        self._log_listener.stop()
 
 # Global instance
 manager = SessionManager()
\ No newline at end of file